@@ -11,7 +11,9 @@ cli = typer.Typer()
 
 @cli.command()
 def run(
-    path: Path,
+    paths: Annotated[
+        list[Path], typer.Argument(help="Playbook(s), applied to the same input")
+    ],
     in_uri: Annotated[
         Optional[str], typer.Option("-i", help="Input uri, use `-` for stdin")
     ] = None,
@@ -24,16 +26,79 @@ def run(
     write_handler: Annotated[
         Optional[str], typer.Option("-wh", help="Write handler for pandas")
     ] = None,
+    read_compression: Annotated[
+        Optional[str],
+        typer.Option("-ic", help="Input compression (default: infer)"),
+    ] = None,
+    write_compression: Annotated[
+        Optional[str],
+        typer.Option("-oc", help="Output compression (default: infer)"),
+    ] = None,
+    manifest: Annotated[
+        Optional[str],
+        typer.Option("--manifest", help="Write a run manifest (json) to this uri"),
+    ] = None,
+    pipeline: Annotated[
+        bool,
+        typer.Option(
+            "--pipeline",
+            help="Read, transform and write chunks (`chunksize`) in parallel stages",
+        ),
+    ] = False,
+    sample: Annotated[
+        Optional[int],
+        typer.Option("--sample", help="Only read the first N rows (implies dry run)"),
+    ] = None,
+    sample_frac: Annotated[
+        Optional[float],
+        typer.Option(
+            "--sample-frac",
+            help="Only read a random fraction of rows (implies dry run)",
+        ),
+    ] = None,
+    dry_run: Annotated[
+        bool,
+        typer.Option("--dry-run", help="Report shape and dtype changes, don't write"),
+    ] = False,
 ):
-    if not path.exists() or not path.is_file():
-        raise ValueError("Invalid path: `%s`" % path)
-    play = Playbook.from_yaml(path)
-    if in_uri is not None:
-        play.read.uri = in_uri
-    if read_handler is not None:
-        play.read.handler = read_handler
-    if out_uri is not None:
-        play.write.uri = out_uri
-    if write_handler is not None:
-        play.write.handler = write_handler
-    play.run(write=True)
+    plays = []
+    for path in paths:
+        if not path.exists() or not path.is_file():
+            raise ValueError("Invalid path: `%s`" % path)
+        plays.append(Playbook.from_yaml(path))
+    if len(plays) > 1 and (out_uri is not None or manifest is not None):
+        raise ValueError("Output and manifest uri can't be set for multiple playbooks")
+    if pipeline and manifest is not None:
+        raise ValueError("A manifest can't be written for pipelined execution")
+    if len(plays) > 1 and pipeline:
+        raise ValueError("Pipelined execution is not supported for multiple playbooks")
+    for play in plays:
+        if in_uri is not None:
+            play.read.uri = in_uri
+        if read_handler is not None:
+            play.read.handler = read_handler
+        if out_uri is not None:
+            play.write.uri = out_uri
+        if write_handler is not None:
+            play.write.handler = write_handler
+        if read_compression is not None:
+            play.read.compression = read_compression
+        if write_compression is not None:
+            play.write.compression = write_compression
+        if manifest is not None:
+            play.manifest = manifest
+    if dry_run or sample is not None or sample_frac is not None:
+        for path, play in zip(paths, plays):
+            if len(plays) > 1:
+                typer.echo(path)
+            for report in play.dry_run(sample=sample, sample_frac=sample_frac):
+                typer.echo(report)
+        return
+    if pipeline:
+        for report in plays[0].run_pipeline():
+            typer.echo(report, err=True)
+        return
+    if len(plays) > 1:
+        Playbook.run_many(plays, write=True)
+        return
+    plays[0].run(write=True)
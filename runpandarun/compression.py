@@ -0,0 +1,152 @@
+"""
+Streaming (de-)compression for any uri, including stdin / stdout, so that
+codecs pandas doesn't know (lz4) or can't infer (streams) are supported.
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+from typing import IO, Any
+
+from runpandarun.types import SDict
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4
+except ImportError:
+    lz4 = None
+
+SUFFIXES = {
+    ".gz": "gzip",
+    ".bz2": "bz2",
+    ".xz": "xz",
+    ".zst": "zstd",
+    ".lz4": "lz4",
+}
+MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"BZh": "bz2",
+    b"\xfd7zXZ\x00": "xz",
+    b"\x28\xb5\x2f\xfd": "zstd",
+    b"\x04\x22\x4d\x18": "lz4",
+}
+METHODS = set(SUFFIXES.values())
+# handled by pandas itself (not streamable)
+ARCHIVE_SUFFIXES = (".zip", ".tar")
+# pandas style option names
+ALIASES = {"compresslevel": "level", "preset": "level", "compression_level": "level"}
+OPTIONS = {
+    "gzip": {"level", "mtime"},
+    "bz2": {"level"},
+    "xz": {"level"},
+    "zstd": {"level", "threads"},
+    "lz4": {"level"},
+}
+
+
+def strip_suffix(path: str) -> str:
+    for suffix in SUFFIXES:
+        if path.lower().endswith(suffix):
+            return path[: -len(suffix)]
+    return path
+
+
+def get_method(compression: str | SDict | None) -> tuple[str | None, SDict]:
+    if isinstance(compression, dict):
+        options = dict(compression)
+        return options.pop("method", None), options
+    return compression, {}
+
+
+def get_options(method: str, options: SDict) -> SDict:
+    """
+    Normalize pandas style option names (e.g. `compresslevel`) and reject
+    options that are not supported for `method`
+    """
+    options = {ALIASES.get(k, k): v for k, v in options.items()}
+    unsupported = set(options) - OPTIONS.get(method, set())
+    if unsupported:
+        raise ValueError(
+            f"Unsupported options for `{method}` compression: "
+            f"`{', '.join(sorted(unsupported))}`"
+        )
+    return options
+
+
+def infer_from_uri(uri: Any) -> str | None:
+    path = str(getattr(uri, "name", uri)).lower()
+    for suffix, method in SUFFIXES.items():
+        if path.endswith(suffix):
+            return method
+    return None
+
+
+def sniff(fh: IO) -> str | None:
+    """
+    Detect the compression of a binary stream by its magic bytes without
+    consuming them
+    """
+    if hasattr(fh, "peek"):
+        head = fh.peek(6)[:6]
+    elif hasattr(fh, "seekable") and fh.seekable():
+        pos = fh.tell()
+        head = fh.read(6)
+        fh.seek(pos)
+    else:
+        return None
+    if not isinstance(head, bytes):  # text stream
+        return None
+    for magic, method in MAGIC.items():
+        if head.startswith(magic):
+            return method
+    return None
+
+
+def open_compressed(fh: IO, method: str, mode: str = "rb", **options) -> IO:
+    """
+    Wrap the binary stream `fh` with a streaming (de-)compressor. Writers
+    default to fast settings, `zstd` compresses with all cpu cores.
+    """
+    write = "w" in mode
+    if method not in METHODS:
+        raise ValueError(f"Unsupported compression: `{method}`")
+    options = get_options(method, options)
+    if method == "gzip":
+        if write:
+            level = options.get("level", 6)
+            return gzip.GzipFile(
+                fileobj=fh, mode="wb", compresslevel=level, mtime=options.get("mtime")
+            )
+        return gzip.GzipFile(fileobj=fh, mode="rb")
+    if method == "bz2":
+        if write:
+            return bz2.BZ2File(fh, "wb", compresslevel=options.get("level", 9))
+        return bz2.BZ2File(fh, "rb")
+    if method == "xz":
+        if write:
+            return lzma.LZMAFile(fh, "wb", preset=options.get("level"))
+        return lzma.LZMAFile(fh, "rb")
+    if method == "zstd":
+        if zstandard is None:
+            raise ImportError("Install `zstandard` to use zstd compression")
+        if write:
+            cctx = zstandard.ZstdCompressor(
+                level=options.get("level", 3), threads=options.get("threads", -1)
+            )
+            return io.BufferedWriter(cctx.stream_writer(fh, closefd=False))
+        dctx = zstandard.ZstdDecompressor()
+        reader = dctx.stream_reader(fh, read_across_frames=True, closefd=False)
+        return io.BufferedReader(reader)
+    if method == "lz4":
+        if lz4 is None:
+            raise ImportError("Install `lz4` to use lz4 compression")
+        if write:
+            level = options.get("level", 0)
+            return lz4.LZ4FrameFile(fh, "wb", compression_level=level)
+        return lz4.LZ4FrameFile(fh, "rb")
+    raise ValueError(f"Unsupported compression: `{method}`")
@@ -0,0 +1,140 @@
+"""
+Faster excel ingestion: Prefer the calamine engine if installed, parse
+multiple sheets in parallel processes and optionally cache the parsed sheets
+as parquet files keyed by the workbook checksum.
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+
+import fsspec
+import orjson
+import pandas as pd
+
+from runpandarun.parallel import local_path
+from runpandarun.types import PathLike
+from runpandarun.util import get_cache_dir
+
+try:
+    import python_calamine
+except ImportError:
+    python_calamine = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+log = logging.getLogger(__name__)
+
+Sheets = pd.DataFrame | dict[str | int, pd.DataFrame]
+# the workbook content or the path of a local workbook
+Source = bytes | str
+
+
+def read_bytes(uri: Any) -> bytes:
+    if hasattr(uri, "read"):
+        return uri.read()
+    with fsspec.open(uri) as fh:
+        return fh.read()
+
+
+def read_sheet(source: Source, sheet: str | int, **kwargs) -> pd.DataFrame:
+    if isinstance(source, bytes):
+        source = BytesIO(source)
+    return pd.read_excel(source, sheet_name=sheet, **kwargs)
+
+
+def read_sheets(source: Source, workers: int | None = None, **kwargs) -> Sheets:
+    """
+    Parse multiple sheets in worker processes. They are spawned (not forked,
+    as this might be called from threads) and read a local workbook by its
+    path instead of getting a copy of its content.
+    """
+    sheet_name = kwargs.pop("sheet_name", 0)
+    if isinstance(sheet_name, (str, int)):
+        return read_sheet(source, sheet_name, **kwargs)
+    if sheet_name is None:
+        engine = kwargs.get("engine")
+        data = BytesIO(source) if isinstance(source, bytes) else source
+        sheet_name = pd.ExcelFile(data, engine=engine).sheet_names
+    workers = min(len(sheet_name), workers or os.cpu_count() or 1)
+    if workers < 2:
+        return {s: read_sheet(source, s, **kwargs) for s in sheet_name}
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        futures = {s: pool.submit(read_sheet, source, s, **kwargs) for s in sheet_name}
+        return {s: f.result() for s, f in futures.items()}
+
+
+def write_cached(df: pd.DataFrame, path: Path) -> bool:
+    try:
+        df.to_parquet(path.with_suffix(".parquet"))
+        return True
+    except (pa.ArrowException, TypeError, ValueError) as e:  # e.g. mixed types
+        log.warning(f"Can't cache sheet as parquet: {e}")
+        return False
+
+
+def read_cached(path: Path) -> pd.DataFrame | None:
+    if path.with_suffix(".parquet").exists():
+        return pd.read_parquet(path.with_suffix(".parquet"))
+    return None
+
+
+def get_cache_key(data: bytes, **kwargs) -> str:
+    key = hashlib.sha256(data)
+    key.update(orjson.dumps(kwargs, default=str, option=orjson.OPT_SORT_KEYS))
+    return key.hexdigest()
+
+
+def read_excel(
+    uri: Any,
+    cache: bool | PathLike | None = None,
+    workers: int | None = None,
+    **kwargs,
+) -> Sheets:
+    """
+    `pd.read_excel` with the calamine engine (if available and no other
+    engine is set), parallel parsing of multiple sheets (`sheet_name: null`
+    or a list) and an optional `cache` (`true` or a directory) of the parsed
+    sheets.
+    """
+    if python_calamine is not None:
+        kwargs.setdefault("engine", "calamine")
+    path = local_path(uri)
+    if path is not None and path.is_file():
+        source = str(path)
+    else:
+        source = read_bytes(uri)
+    if cache and pa is None:
+        log.warning("Install `pyarrow` to cache excel sheets")
+        cache = None
+    if not cache:
+        return read_sheets(source, workers, **kwargs)
+
+    data = read_bytes(source) if isinstance(source, str) else source
+    base = get_cache_dir(cache, "excel") / get_cache_key(data, **kwargs)
+    index = base.with_suffix(".json")
+    if index.exists():
+        sheets = orjson.loads(index.read_bytes())
+        cached = [read_cached(base / str(i)) for i in range(len(sheets["names"]))]
+        if all(df is not None for df in cached):
+            if sheets["single"]:
+                return cached[0]
+            return dict(zip(sheets["names"], cached))
+
+    res = read_sheets(source, workers, **kwargs)
+    single = isinstance(res, pd.DataFrame)
+    frames = {kwargs.get("sheet_name", 0): res} if single else res
+    base.mkdir(parents=True, exist_ok=True)
+    if all(write_cached(df, base / str(i)) for i, df in enumerate(frames.values())):
+        names = list(frames.keys())
+        index.write_bytes(orjson.dumps({"names": names, "single": single}))
+    return res
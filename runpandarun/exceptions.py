@@ -1,2 +1,6 @@
 class SpecError(Exception):
     pass
+
+
+class SchemaError(Exception):
+    pass
@@ -1,25 +1,63 @@
+import random
 import sys
+from contextlib import ExitStack, nullcontext
 from pathlib import Path
-from typing import IO, Any, AnyStr, BinaryIO, TextIO, TypeAlias
+from typing import IO, Any, AnyStr, BinaryIO, Generator, Iterator, TextIO, TypeAlias
 from urllib.parse import urlparse
 
 import fsspec
-import orjson
 import pandas as pd
 from pydantic import BaseModel, ConfigDict, field_validator
 from rigour.mime import types
 
+from runpandarun.compression import (
+    METHODS,
+    get_method,
+    infer_from_uri,
+    open_compressed,
+    sniff,
+)
+from runpandarun.excel import read_excel
 from runpandarun.exceptions import SpecError
+from runpandarun.parallel import (
+    PARALLEL_HANDLERS,
+    can_split,
+    get_parallel_options,
+    local_path,
+    read_csv_parallel,
+)
+from runpandarun.stream import is_json_lines, read_json_normalize
 from runpandarun.types import PathLike, SDict
 from runpandarun.util import guess_mimetype
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
 Uri: TypeAlias = Path | BinaryIO | TextIO | str | IO[AnyStr]
 
+CSV_HANDLERS = ("read_csv", "read_table", "read_fwf")
+# handlers for (text) formats that are compressed as a whole stream
+STREAM_HANDLERS = (
+    *CSV_HANDLERS,
+    "read_json",
+    "json_normalize",
+    "read_xml",
+    "read_html",
+    "to_csv",
+    "to_json",
+    "to_xml",
+    "to_html",
+)
+
 
 class Handler(BaseModel):
     options: SDict | None = {}
     uri: Uri | None = "-"
     handler: str | None = None
+    compression: str | SDict | None = None
     model_config = ConfigDict(extra="forbid", arbitrary_types_allowed=True)
 
     @field_validator("handler")
@@ -41,13 +79,33 @@ class Handler(BaseModel):
             return f"read_{handler}"
         return self._default_handler
 
+    def get_options(self, uri: Uri | None = None) -> SDict:
+        if self.compression is None:
+            return self.options
+        return {**self.options, "compression": self.compression}
+
 
 class ReadHandler(Handler):
     _default_handler = "read_csv"
 
-    def handle(self, uri: Uri | None = None) -> pd.DataFrame:
+    def handle(
+        self,
+        uri: Uri | None = None,
+        sample: int | None = None,
+        sample_frac: float | None = None,
+        seed: int | None = None,
+    ) -> pd.DataFrame:
         uri = uri or self.uri
-        return read_pandas(uri, self.get_name(), **self.options)
+        options = self.get_options(uri)
+        if sample is not None or sample_frac is not None:
+            return read_pandas_sample(
+                uri, self.get_name(), sample, sample_frac, seed, **options
+            )
+        return read_pandas(uri, self.get_name(), **options)
+
+    def get_options(self, uri: Uri | None = None) -> SDict:
+        options = super().get_options(uri)
+        return get_parallel_options(self.get_name(), uri or self.uri, options)
 
 
 class WriteHandler(Handler):
@@ -55,7 +113,7 @@ class WriteHandler(Handler):
 
     def handle(self, df: pd.DataFrame, uri: Uri | None = None) -> None:
         uri = uri or self.uri
-        return write_pandas(df, uri, self.get_name(), **self.options)
+        return write_pandas(df, uri, self.get_name(), **self.get_options(uri))
 
 
 def read_pandas(
@@ -65,12 +123,116 @@ def read_pandas(
 ) -> pd.DataFrame:
     if uri == "-":
         uri = sys.stdin.buffer
+    if handler in STREAM_HANDLERS:
+        compression = kwargs.pop("compression", "infer")
+        method, options = get_compression(uri, compression, "rb")
+        if method in METHODS:
+            return read_compressed(uri, handler, method, options, **kwargs)
+        if method is not None:  # e.g. zip, tar
+            kwargs["compression"] = compression
+    if handler == "json_normalize":
+        return read_json_normalize(uri, **kwargs)
+    if handler == "read_excel":
+        return read_excel(uri, **kwargs)
+    if handler in PARALLEL_HANDLERS and "parallel" in kwargs:
+        parallel = kwargs.pop("parallel")
+        path = local_path(uri)
+        if parallel and path is not None and can_split(path, **kwargs):
+            workers = None if parallel is True else int(parallel)
+            return read_csv_parallel(path, getattr(pd, handler), workers, **kwargs)
     arg, kwargs = get_pandas_kwargs(handler, uri, **kwargs)
     handler = getattr(pd, handler)
     res = handler(arg, **kwargs)
     return res
 
 
+def read_pandas_sample(
+    uri: Uri,
+    handler: str | None = "read_csv",
+    n: int | None = None,
+    frac: float | None = None,
+    seed: int | None = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Read only the first `n` rows or a random fraction `frac` of the source.
+    Where the handler allows it, the sampling is pushed down into the reader
+    so that the rest of the source is never parsed.
+    """
+    if n is None and frac is None:
+        return read_pandas(uri, handler, **kwargs)
+    if uri == "-":
+        uri = sys.stdin.buffer
+    rng = random.Random(seed)
+    df = None
+    if handler == "json_normalize" and n is not None:
+        chunks = read_pandas(uri, handler, **{**kwargs, "chunksize": n})
+        df = next(chunks, pd.DataFrame())
+    elif handler in CSV_HANDLERS and not kwargs.get("skipfooter"):
+        if n is not None:
+            kwargs["nrows"] = n
+        elif "skiprows" not in kwargs and kwargs.get("header", 0) == 0:
+            # bernoulli sample of the data rows, always keep the header
+            keep = frac
+            kwargs["skiprows"] = lambda i: i > 0 and rng.random() >= keep
+            frac = None
+    elif handler == "read_excel" and n is not None:
+        kwargs["nrows"] = n
+    elif handler == "read_json" and kwargs.get("lines") and n is not None:
+        kwargs["nrows"] = n
+    elif handler in ("read_sql", "read_sql_query") and n is not None:
+        sql = str(kwargs.get("sql", "")).strip().rstrip(";")
+        if sql and len(sql.split()) == 1:  # table name
+            kwargs["sql"] = f"SELECT * FROM {sql} LIMIT {n}"
+        elif sql:
+            kwargs["sql"] = f"SELECT * FROM ({sql}) AS sample LIMIT {n}"
+    elif handler == "read_parquet" and pq is not None and set(kwargs) <= {"columns"}:
+        df = read_parquet_sample(uri, n, frac, rng, **kwargs)
+        frac = None
+    if df is None:
+        df = read_pandas(uri, handler, **kwargs)
+    if isinstance(df, dict):  # multiple excel sheets
+        return {k: sample_frame(v, n, frac, seed) for k, v in df.items()}
+    return sample_frame(df, n, frac, seed)
+
+
+def sample_frame(
+    df: pd.DataFrame, n: int | None, frac: float | None, seed: int | None
+) -> pd.DataFrame:
+    if n is not None:
+        return df.head(n)
+    if frac is not None:
+        return df.sample(frac=frac, random_state=seed).sort_index()
+    return df
+
+
+def read_parquet_sample(
+    uri: Uri,
+    n: int | None,
+    frac: float | None,
+    rng: random.Random,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Read the first batch of `n` rows or a random subset of row groups
+    """
+    context = nullcontext(uri) if hasattr(uri, "read") else fsspec.open(uri)
+    with context as fh:
+        pf = pq.ParquetFile(fh)
+        if n is not None:
+            batches = pf.iter_batches(batch_size=n, columns=columns)
+            batch = next(batches, None)
+            if batch is None:
+                table = pf.schema_arrow.empty_table()
+            else:
+                table = pa.Table.from_batches([batch])
+        else:
+            groups = range(pf.num_row_groups)
+            k = min(len(groups), max(1, round(frac * len(groups))))
+            table = pf.read_row_groups(sorted(rng.sample(groups, k)), columns=columns)
+    return table.to_pandas()
+
+
 def write_pandas(
     df: pd.DataFrame,
     uri: Uri,
@@ -79,17 +241,69 @@ def write_pandas(
 ) -> None:
     if uri == "-":
         uri = sys.stdout.buffer
+    elif isinstance(uri, str) and uri.startswith("file:"):
+        uri = str(local_path(uri))  # pandas can only read file urls
+    if handler in STREAM_HANDLERS:
+        compression = kwargs.pop("compression", "infer")
+        method, options = get_compression(uri, compression, "wb")
+        if method is not None and method not in METHODS:  # e.g. zip, tar
+            kwargs["compression"] = compression
+        elif method is not None:
+            storage_options = kwargs.pop("storage_options", None) or {}
+            with ExitStack() as stack:
+                if not hasattr(uri, "write"):
+                    uri = stack.enter_context(fsspec.open(uri, "wb", **storage_options))
+                fh = stack.enter_context(open_compressed(uri, method, "wb", **options))
+                return write_pandas(df, fh, handler, compression=None, **kwargs)
     arg, kwargs = get_pandas_kwargs(handler, uri, **kwargs)
     handler = getattr(df, handler)
     res = handler(arg, **kwargs)
     return res
 
 
-def read_json(uri: Uri) -> Any:
-    if hasattr(uri, "read"):  # TextIOWrapper
-        return orjson.loads(uri.read())
-    with fsspec.open(uri) as f:
-        return orjson.loads(f.read())
+def get_compression(
+    uri: Uri, compression: str | SDict | None, mode: str | None = "rb"
+) -> tuple[str | None, SDict]:
+    """
+    Resolve the compression method (and its options) for `uri`: Infer it by
+    the magic bytes of an input stream or by the file extension.
+    """
+    method, options = get_method(compression)
+    if method == "infer":
+        if hasattr(uri, "read") and "r" in mode:
+            method = sniff(uri)
+        elif hasattr(uri, "write"):
+            method = None
+        else:
+            method = infer_from_uri(uri)
+    return method, options
+
+
+def read_compressed(
+    uri: Uri, handler: str, method: str, options: SDict, **kwargs
+) -> pd.DataFrame | Iterator[pd.DataFrame]:
+    if handler == "json_normalize" and "lines" not in kwargs:
+        kwargs["lines"] = is_json_lines(uri)
+    storage_options = kwargs.pop("storage_options", None) or {}
+    # only apply to the raw file, not to the decompressed stream
+    kwargs.pop("memory_map", None)
+    kwargs.pop("parallel", None)
+    stack = ExitStack()
+    if not hasattr(uri, "read"):
+        uri = stack.enter_context(fsspec.open(uri, "rb", **storage_options))
+    fh = stack.enter_context(open_compressed(uri, method, "rb", **options))
+    res = read_pandas(fh, handler, compression=None, **kwargs)
+    if isinstance(res, pd.DataFrame):
+        stack.close()
+        return res
+    return iter_and_close(res, stack)  # keep the stream open for chunks
+
+
+def iter_and_close(
+    chunks: Iterator[pd.DataFrame], stack: ExitStack
+) -> Generator[pd.DataFrame, None, None]:
+    with stack:
+        yield from chunks
 
 
 def guess_handler_from_mimetype(mimetype: str) -> str:
@@ -124,9 +338,7 @@ def get_pandas_kwargs(handler: str, uri: Uri, **kwargs) -> tuple[Any, dict[str,
     Try to align our Spec with `uri` param to pandas api.
     """
     arg = uri
-    if handler == "json_normalize":
-        arg = read_json(uri)
-    elif "sql" in handler:
+    if "sql" in handler:
         arg = kwargs.pop("sql", None)
         if not isinstance(arg, str):
             raise SpecError("Provide `sql` parameter: A table name or SQL query")
@@ -0,0 +1,194 @@
+"""
+Parallel parsing of large local csv files: The memory mapped file is split
+on line boundaries (outside of quoted values) into byte ranges which are
+parsed in a thread pool, each with the header line prepended.
+"""
+
+import codecs
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import unquote, urlparse
+
+import pandas as pd
+
+from runpandarun.compression import ARCHIVE_SUFFIXES, SUFFIXES
+
+PARALLEL_HANDLERS = ("read_csv", "read_table")
+PARALLEL_MIN_SIZE = 64 * 1024 * 1024  # auto-select for local files of this size
+COMPRESSED_SUFFIXES = (*SUFFIXES, *ARCHIVE_SUFFIXES)
+# options that depend on the position within the whole file
+UNSUPPORTED_OPTIONS = (
+    "skiprows",
+    "skipfooter",
+    "nrows",
+    "chunksize",
+    "iterator",
+    "escapechar",
+)
+
+
+def local_path(uri: Any) -> Path | None:
+    if isinstance(uri, Path):
+        return uri
+    if isinstance(uri, str) and uri != "-":
+        parsed = urlparse(uri)
+        if parsed.scheme == "file":
+            return Path(unquote(parsed.path))
+        if not parsed.scheme:
+            return Path(uri)
+    return None
+
+
+def is_compressed(path: Path, **kwargs) -> bool:
+    if kwargs.get("compression") not in (None, "infer"):
+        return True
+    return path.name.lower().endswith(COMPRESSED_SUFFIXES)
+
+
+def can_split(path: Path, **kwargs) -> bool:
+    """
+    Check if the file can be parsed in byte ranges with the given options
+    """
+    if any(kwargs.get(k) for k in UNSUPPORTED_OPTIONS):
+        return False
+    if kwargs.get("engine") == "pyarrow":  # already multithreaded
+        return False
+    if kwargs.get("quoting") == 3 or kwargs.get("doublequote") is False:
+        return False  # quote parity can't be used to detect quoted newlines
+    if is_compressed(path, **kwargs):
+        return False
+    if kwargs.get("header", "infer") not in ("infer", 0, None):
+        return False
+    encoding = codecs.lookup(kwargs.get("encoding") or "utf-8").name
+    if encoding.startswith(("utf-16", "utf-32")):
+        return False
+    return path.is_file()
+
+
+def find_line_end(
+    mm: mmap.mmap, start: int, target: int, quotes: int, quotechar: bytes
+) -> tuple[int, int]:
+    """
+    Find the first line end at or after `target` that is not within a quoted
+    value. `quotes` is the number of quote chars in `mm[:start]`, returns the
+    offset after the line end and the number of quote chars before it.
+    """
+    quotes += mm[start:target].count(quotechar)
+    pos = target
+    while True:
+        end = mm.find(b"\n", pos)
+        if end == -1:
+            return len(mm), quotes
+        quotes += mm[pos:end].count(quotechar)
+        pos = end + 1
+        if quotes % 2 == 0:
+            return pos, quotes
+
+
+def split_lines(
+    mm: mmap.mmap, parts: int, header: bool | None = True, quotechar: bytes = b'"'
+) -> tuple[int, list[int]]:
+    """
+    Return the end of the header line and the offsets of up to `parts` byte
+    ranges of the body
+    """
+    size = len(mm)
+    header_end, quotes = 0, 0
+    if header:
+        header_end, quotes = find_line_end(mm, 0, 0, 0, quotechar)
+    offsets = [header_end]
+    for i in range(1, parts):
+        target = header_end + (size - header_end) * i // parts
+        if target <= offsets[-1]:
+            continue
+        end, quotes = find_line_end(mm, offsets[-1], target, quotes, quotechar)
+        if end >= size:
+            break
+        offsets.append(end)
+    offsets.append(size)
+    return header_end, offsets
+
+
+def read_csv_parallel(
+    path: Path,
+    read: Callable[..., pd.DataFrame] = pd.read_csv,
+    workers: int | None = None,
+    **kwargs,
+) -> pd.DataFrame:
+    """
+    Parse the byte ranges of a csv file in parallel. The dtypes inferred from
+    the first range are passed to the others, if they don't fit (or result in
+    different dtypes) the file is parsed serially to get the same result as
+    a regular read.
+    """
+    workers = workers or os.cpu_count() or 1
+    header = kwargs.get("header", "infer")
+    has_header = header == 0 or (header == "infer" and kwargs.get("names") is None)
+    quotechar = kwargs.get("quotechar", '"').encode()
+    with open(path, "rb") as fh:
+        if not os.fstat(fh.fileno()).st_size:
+            return read(path, **kwargs)
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header_end, offsets = split_lines(mm, workers, has_header, quotechar)
+            head = mm[:header_end]
+
+            def parse(start: int, end: int, **options) -> pd.DataFrame:
+                return read(BytesIO(head + mm[start:end]), **{**kwargs, **options})
+
+            first = parse(offsets[0], offsets[1])
+            if len(offsets) < 3:
+                return first
+            dtype = get_dtype(first, kwargs.get("dtype"))
+            try:
+                with ThreadPoolExecutor(workers) as pool:
+                    chunks = list(
+                        pool.map(
+                            lambda start, end: parse(start, end, dtype=dtype),
+                            offsets[1:-1],
+                            offsets[2:],
+                        )
+                    )
+            except (ValueError, TypeError):  # later ranges don't fit the dtypes
+                return read(path, **kwargs)
+    df = pd.concat([first, *chunks], ignore_index=kwargs.get("index_col") is None)
+    if not df.dtypes.equals(first.dtypes) or df.index.dtype != first.index.dtype:
+        return read(path, **kwargs)
+    return df
+
+
+def get_dtype(df: pd.DataFrame, dtype: Any = None) -> Any:
+    """
+    The dtypes of `df` (except dates, they are handled via `parse_dates`)
+    updated with the explicitly configured `dtype`
+    """
+    if dtype is not None and not isinstance(dtype, dict):
+        return dtype
+    dtypes = {
+        c: t
+        for c, t in df.dtypes.items()
+        if not pd.api.types.is_datetime64_any_dtype(t)
+    }
+    return {**dtypes, **(dtype or {})}
+
+
+def get_parallel_options(handler: str, uri: Any, options: dict[str, Any]) -> dict:
+    """
+    Auto-select parallel parsing (or at least memory mapping) for large local
+    csv files if not configured otherwise
+    """
+    if handler not in PARALLEL_HANDLERS or "parallel" in options:
+        return options
+    path = local_path(uri)
+    if path is None or not path.is_file():
+        return options
+    if path.stat().st_size < PARALLEL_MIN_SIZE:
+        return options
+    if (os.cpu_count() or 1) > 1 and can_split(path, **options):
+        return {**options, "parallel": True}
+    if options.get("engine", "c") == "c" and not is_compressed(path, **options):
+        return {"memory_map": True, **options}
+    return options
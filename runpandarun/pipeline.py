@@ -0,0 +1,199 @@
+"""
+Overlapped execution of a playbook on chunked input: reading, transforming
+and writing run in separate threads connected by bounded queues, so that
+I/O and compute overlap while the queue size caps memory usage.
+"""
+
+import sys
+import time
+from contextlib import ExitStack
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from typing import IO, TYPE_CHECKING, Any, Iterator
+
+import fsspec
+import pandas as pd
+
+from runpandarun.compression import (
+    ARCHIVE_SUFFIXES,
+    METHODS,
+    get_method,
+    open_compressed,
+)
+from runpandarun.io import WriteHandler, get_compression, write_pandas
+from runpandarun.report import StageReport
+
+if TYPE_CHECKING:
+    from runpandarun.playbook import Playbook
+
+DONE = object()
+
+
+class ChunkWriter:
+    """
+    Write DataFrame chunks to one target: Append to a single stream for csv
+    and json lines, append to sql tables, or collect the chunks and write
+    them at once for other formats.
+    """
+
+    def __init__(self, handler: WriteHandler):
+        self.uri = handler.uri
+        self.name = handler.get_name()
+        self.options = handler.get_options()
+        self.stack = ExitStack()
+        self.fh: IO | None = None
+        self.chunks: list[pd.DataFrame] = []
+        self.first = True
+
+    def is_stream(self) -> bool:
+        if self.is_archive():
+            return False
+        if self.name == "to_csv":
+            return True
+        return self.name == "to_json" and bool(self.options.get("lines"))
+
+    def is_archive(self) -> bool:
+        """
+        zip and tar targets are written by pandas at once
+        """
+        method, _ = get_method(self.options.get("compression", "infer"))
+        if method == "infer":
+            return str(self.uri).lower().endswith(ARCHIVE_SUFFIXES)
+        return method is not None and method not in METHODS
+
+    def open(self) -> IO:
+        options = dict(self.options)
+        uri = sys.stdout.buffer if self.uri == "-" else self.uri
+        compression = options.pop("compression", "infer")
+        method, compression = get_compression(uri, compression, "wb")
+        storage_options = options.pop("storage_options", None) or {}
+        if not hasattr(uri, "write"):
+            uri = self.stack.enter_context(fsspec.open(uri, "wb", **storage_options))
+        if method is not None:
+            uri = self.stack.enter_context(
+                open_compressed(uri, method, "wb", **compression)
+            )
+        self.options = options
+        return uri
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.is_stream():
+            if self.fh is None:
+                self.fh = self.open()
+            options = dict(self.options)
+            if self.name == "to_csv" and not self.first:
+                options["header"] = False
+            write_pandas(df, self.fh, self.name, compression=None, **options)
+        elif "sql" in self.name:
+            options = dict(self.options)
+            if not self.first:
+                options["if_exists"] = "append"
+            write_pandas(df, self.uri, self.name, **options)
+        else:
+            self.chunks.append(df)
+        self.first = False
+
+    def close(self) -> None:
+        with self.stack:
+            if self.chunks:
+                write_pandas(
+                    pd.concat(self.chunks), self.uri, self.name, **self.options
+                )
+
+
+def iter_chunks(data: pd.DataFrame | Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    if isinstance(data, pd.DataFrame):
+        return iter([data])
+    return iter(data)
+
+
+class Pipeline:
+    def __init__(self, play: "Playbook", queue_size: int | None = 2):
+        self.play = play
+        self.transform_queue = Queue(maxsize=queue_size or 0)
+        self.write_queue = Queue(maxsize=queue_size or 0)
+        self.stop = Event()
+        self.errors: list[Exception] = []
+        self.stats = {
+            stage: {"chunks": 0, "rows": 0, "busy": 0.0}
+            for stage in ("read", "transform", "write")
+        }
+
+    def run(self) -> list[StageReport]:
+        start = time.perf_counter()
+        threads = [
+            Thread(target=self.guard, args=(stage,), daemon=True)
+            for stage in (self.read, self.transform, self.write)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self.errors:
+            raise self.errors[0]
+        wall = time.perf_counter() - start
+        return [StageReport(stage=s, wall=wall, **v) for s, v in self.stats.items()]
+
+    def guard(self, stage) -> None:
+        try:
+            stage()
+        except Exception as e:
+            self.errors.append(e)
+            self.stop.set()
+
+    def track(self, stage: str, start: float, df: Any = None) -> None:
+        stats = self.stats[stage]
+        stats["busy"] += time.perf_counter() - start
+        if isinstance(df, pd.DataFrame):
+            stats["chunks"] += 1
+            stats["rows"] += len(df)
+
+    def put(self, queue: Queue, item: Any) -> bool:
+        while not self.stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def get(self, queue: Queue) -> Any:
+        while True:
+            try:
+                return queue.get(timeout=0.1)
+            except Empty:
+                if self.stop.is_set():
+                    return DONE
+
+    def read(self) -> None:
+        start = time.perf_counter()
+        chunks = iter_chunks(self.play.read.handle())
+        while True:
+            df = next(chunks, DONE)
+            self.track("read", start, df)
+            if not self.put(self.transform_queue, df) or df is DONE:
+                return
+            start = time.perf_counter()
+
+    def transform(self) -> None:
+        while (df := self.get(self.transform_queue)) is not DONE:
+            start = time.perf_counter()
+            df = self.play.transform(df)
+            self.track("transform", start, df)
+            if not self.put(self.write_queue, df):
+                return
+        self.put(self.write_queue, DONE)
+
+    def write(self) -> None:
+        writer = ChunkWriter(self.play.write)
+        try:
+            while (df := self.get(self.write_queue)) is not DONE:
+                start = time.perf_counter()
+                writer.write(df)
+                self.track("write", start, df)
+            if not self.stop.is_set():
+                start = time.perf_counter()
+                writer.close()
+                self.track("write", start)
+        finally:
+            writer.stack.close()
@@ -1,15 +1,43 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, TypeVar
+from typing import Any, Generator, TypeVar
 
 import yaml
-from pandas import DataFrame, Series
-from pydantic import BaseModel, ConfigDict, model_validator
+from pandas import DataFrame, Series, concat
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator
 
 from runpandarun.datapatch import Patches, apply_patches
 from runpandarun.exceptions import SpecError
 from runpandarun.io import ReadHandler, WriteHandler
+from runpandarun.pipeline import Pipeline
+from runpandarun.report import (
+    Manifest,
+    Resource,
+    StageReport,
+    StepReport,
+    get_config_checksum,
+    get_data_checksum,
+    get_dtypes,
+    get_file_checksum,
+    get_size,
+)
+from runpandarun.schema import DTYPE_HANDLERS, Schema, SchemaCache
 from runpandarun.types import PathLike
-from runpandarun.util import absolute_path_uri, expandvars, getattr_by_path, safe_eval
+from runpandarun.util import (
+    SAFE_NAMESPACE,
+    absolute_path,
+    absolute_path_uri,
+    expandvars,
+    getattr_by_path,
+    safe_eval,
+)
+
+try:
+    import numexpr
+except ImportError:
+    numexpr = None
 
 P = TypeVar("P", bound="Playbook")
 
@@ -23,6 +51,7 @@ MODULES = {
     "DataFrame": DataFrame,
     "Series": Series,
 }
+EXPR_OPTIONS = {"assign", "filter"}
 
 
 class Operation(ExpandMixin, BaseModel):
@@ -33,6 +62,8 @@ class Operation(ExpandMixin, BaseModel):
 
     @model_validator(mode="before")
     def validate_handler(cls, values):
+        if isinstance(values, dict) and values.get("handler") == "expr":
+            return cls.validate_expr(values)
         try:
             handler = values["handler"]
             module, func = handler.split(".", 1)
@@ -50,7 +81,41 @@ class Operation(ExpandMixin, BaseModel):
             raise SpecError(f"Could not load function `{handler}`: {e}")
         return values
 
+    @classmethod
+    def validate_expr(cls, values):
+        options = values.get("options") or {}
+        if not options or set(options) - EXPR_OPTIONS:
+            raise SpecError(
+                f"The `expr` handler takes `assign` and / or `filter` options, "
+                f"got: `{', '.join(options)}`"
+            )
+        if values.get("column") is not None:
+            raise SpecError("The `expr` handler doesn't take a `column` parameter.")
+        return values
+
+    def apply_expr(self, df: DataFrame) -> DataFrame:
+        """
+        Evaluate vectorized expressions via `DataFrame.eval` / `query` (with
+        the numexpr engine if installed) with the same namespace as
+        `safe_eval` (referenced via `@`, e.g. `@np.pi`)
+        """
+        options = {
+            "engine": "numexpr" if numexpr is not None else "python",
+            "global_dict": SAFE_NAMESPACE,
+            "local_dict": {},
+        }
+        assign = self.options.get("assign") or {}
+        if assign:
+            df = df.copy(deep=False)
+            for column, expr in assign.items():
+                df[column] = df.eval(str(expr), **options)
+        if self.options.get("filter"):
+            df = df.query(str(self.options["filter"]), **options)
+        return df
+
     def apply(self, df: DataFrame) -> DataFrame:
+        if self.handler == "expr":
+            return self.apply_expr(df)
         options = {}
         for key, value in self.options.items():
             if key == "func" or (isinstance(value, str) and value.startswith("lambda")):
@@ -67,27 +132,265 @@ class Operation(ExpandMixin, BaseModel):
         return df
 
 
+def get_common_prefix(plays: list["Playbook"]) -> int:
+    """
+    Number of leading operations that are identical in all playbooks
+    """
+    operations = [[op.model_dump() for op in play.operations] for play in plays]
+    prefix = 0
+    for ops in zip(*operations):
+        if any(op != ops[0] for op in ops[1:]):
+            break
+        prefix += 1
+    return prefix
+
+
 class Playbook(ExpandMixin, BaseModel):
     read: ReadHandler | None = ReadHandler()
     operations: list[Operation] | None = []
     patch: Patches | None = None
     write: WriteHandler | None = WriteHandler()
+    manifest: bool | str | None = False
+    schema_cache: SchemaCache | None = None
     model_config = ConfigDict(extra="forbid")
 
+    @field_validator("schema_cache", mode="before")
+    @classmethod
+    def validate_schema_cache(cls, v):
+        if v is True:
+            return SchemaCache()
+        if v is False:
+            return None
+        return v
+
     def run(self, df: DataFrame | None = None, write: bool | None = False) -> DataFrame:
-        if df is None:
-            df = self.read.handle()
+        df, _ = self.execute(df, write=write)
+        return df
 
-        for op in self.operations:
+    @classmethod
+    def run_many(
+        cls,
+        plays: list[P],
+        df: DataFrame | None = None,
+        write: bool | None = False,
+        workers: int | None = None,
+    ) -> list[DataFrame]:
+        """
+        Run multiple playbooks against one input that is read only once (all
+        playbooks need the same `read` config). A common prefix of identical
+        operations is applied only once, then each playbook gets a (copy on
+        write) copy of the shared data and the playbooks run concurrently.
+        """
+        if not plays:
+            return []
+        if write:
+            targets = [str(play.write.uri) for play in plays]
+            if len(set(targets)) < len(targets):
+                raise SpecError(
+                    "Playbooks can't write to the same target (e.g. stdout)"
+                )
+        if df is None:
+            read = plays[0].read.model_dump()
+            if any(play.read.model_dump() != read for play in plays[1:]):
+                raise SpecError("All playbooks need the same `read` config")
+            df, schema = plays[0].read_input()
+        else:
+            schema = None
+        df = df.copy(deep=False)  # don't alter the given DataFrame
+        prefix = get_common_prefix(plays)
+        for op in plays[0].operations[:prefix]:
             df = op.apply(df)
 
-        if self.patch:
-            df = apply_patches(self.patch, df)
+        def run(play: P) -> DataFrame:
+            result, _ = play.execute(df.copy(deep=False), write=write, skip=prefix)
+            return result
+
+        with ThreadPoolExecutor(workers) as pool:
+            results = list(pool.map(run, plays))
+        plays[0].save_schema(schema)
+        return results
+
+    def execute(
+        self,
+        df: DataFrame | None = None,
+        write: bool | None = False,
+        sample: int | None = None,
+        sample_frac: float | None = None,
+        seed: int | None = None,
+        skip: int | None = 0,
+    ) -> tuple[DataFrame, list[StepReport]]:
+        """
+        Run the playbook (optionally on a sample of the input) and report
+        duration, shape and dtype changes for each step. `skip` the first
+        operations if they are already applied to the given `df`.
+        """
+        manifest = self.get_manifest_uri() if write else None
+        started = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        size, schema = None, None
+        if df is None:
+            df, schema = self.read_input(sample, sample_frac, seed)
+            duration = time.perf_counter() - start
+            sampled = sample is not None or sample_frac is not None
+            if manifest is not None and not sampled:  # avoid requests otherwise
+                size = get_size(self.read.uri)
+        else:
+            duration = time.perf_counter() - start
+        reports = [StepReport.from_step("read", {}, df, duration, size)]
+
+        dtypes = get_dtypes(df)
+        start = time.perf_counter()
+        for step, result in self.iter_steps(df, skip):
+            duration = time.perf_counter() - start
+            reports.append(StepReport.from_step(step, dtypes, result, duration))
+            df, dtypes = result, get_dtypes(result)
+            start = time.perf_counter()
 
         if write:
             self.write.handle(df)
+            duration = time.perf_counter() - start
+            size = get_size(self.write.uri) if manifest is not None else None
+            reports.append(StepReport.from_step("write", dtypes, df, duration, size))
+            if manifest is not None:
+                self.make_manifest(df, reports, started).write(manifest)
+        self.save_schema(schema)  # only record schemas of successful runs
+        return df, reports
+
+    def read_input(
+        self,
+        sample: int | None = None,
+        sample_frac: float | None = None,
+        seed: int | None = None,
+    ) -> tuple[DataFrame, Schema | None]:
+        """
+        Read the input. With a `schema_cache`, apply the schema recorded for
+        this input instead of inferring dtypes, and handle drift according to
+        the cache mode (re-infer, or raise). Returns the data and the newly
+        inferred schema that should be recorded after a successful run.
+        """
+        sampled = sample is not None or sample_frac is not None
+        cache = self.schema_cache
+        if self.read.uri == "-":  # stdin can't be read again on drift
+            cache = None
+        key = self.get_schema_key() if cache is not None else None
+        schema = cache.load(key) if cache is not None else None
+
+        def read(schema: Schema | None = None) -> DataFrame:
+            handler = self.read
+            if schema is not None:
+                options = schema.get_read_options(handler.get_name(), handler.options)
+                handler = handler.model_copy(update={"options": options})
+            df = handler.handle(sample=sample, sample_frac=sample_frac, seed=seed)
+            if not isinstance(df, DataFrame):  # chunked input
+                df = concat(df)
+            if schema is not None and handler.get_name() not in DTYPE_HANDLERS:
+                df = schema.apply(df)
+            return df
+
+        if schema is not None:
+            try:
+                df = read(schema)
+                drift = schema.check(df)
+            except (ValueError, TypeError, KeyError) as e:
+                drift = [str(e)]
+            if not drift:
+                return df, None
+            cache.drift(key, drift)
+        df = read()
+        if cache is not None and not sampled:
+            return df, Schema.from_df(df)
+        return df, None
+
+    def save_schema(self, schema: Schema | None) -> None:
+        if schema is not None:
+            self.schema_cache.save(self.get_schema_key(), schema)
+
+    def get_schema_key(self) -> str:
+        return get_config_checksum(self.read.model_dump())
+
+    def run_pipeline(self, queue_size: int | None = 2) -> list[StageReport]:
+        """
+        Read (chunked input, configured via `chunksize` in the read options),
+        transform and write in overlapping threads connected by queues of at
+        most `queue_size` chunks. Operations are applied per chunk, so they
+        need to be row-wise. Returns the utilization of each stage.
+        """
+        if self.manifest or self.schema_cache is not None:
+            raise SpecError(
+                "`manifest` and `schema_cache` are not supported for pipelined runs"
+            )
+        return Pipeline(self, queue_size).run()
+
+    def transform(self, df: DataFrame) -> DataFrame:
+        for _, result in self.iter_steps(df):
+            df = result
         return df
 
+    def iter_steps(
+        self, df: DataFrame, skip: int | None = 0
+    ) -> Generator[tuple[str, DataFrame], None, None]:
+        """
+        Apply the operations (except the first `skip` ones) and patches one by
+        one and yield the name of each step and its result
+        """
+        for op in self.operations[skip:]:
+            df = op.apply(df)
+            yield op.handler, df
+
+        if self.patch:
+            df = apply_patches(self.patch, df)
+            yield "patch", df
+
+    def dry_run(
+        self,
+        df: DataFrame | None = None,
+        sample: int | None = None,
+        sample_frac: float | None = None,
+        seed: int | None = None,
+    ) -> list[StepReport]:
+        """
+        Run the playbook (optionally on a sample of the input) without writing
+        and report shape and dtype changes for each step
+        """
+        _, reports = self.execute(df, sample=sample, sample_frac=sample_frac, seed=seed)
+        return reports
+
+    def get_manifest_uri(self) -> str | None:
+        if not self.manifest:
+            return None
+        if isinstance(self.manifest, str):
+            return self.manifest
+        if not isinstance(self.write.uri, (str, Path)) or self.write.uri == "-":
+            raise SpecError("Provide a `manifest` uri when not writing to a file")
+        return f"{self.write.uri}.manifest.json"
+
+    def make_manifest(
+        self, df: DataFrame, reports: list[StepReport], started: datetime
+    ) -> Manifest:
+        read, write = reports[0], reports[-1]
+        return Manifest(
+            playbook=get_config_checksum(
+                self.model_dump(exclude={"manifest", "schema_cache"})
+            ),
+            started=started,
+            duration=sum(r.duration for r in reports),
+            input=Resource(
+                uri=str(self.read.uri),
+                bytes=read.bytes,
+                rows=read.rows,
+                columns=read.columns,
+            ),
+            output=Resource(
+                uri=str(self.write.uri),
+                bytes=write.bytes,
+                rows=write.rows,
+                columns=write.columns,
+                checksum=get_data_checksum(df),
+                file_checksum=get_file_checksum(self.write.uri),
+            ),
+            steps=reports,
+        )
+
     @classmethod
     def from_yaml(cls, path: PathLike) -> P:
         path = Path(path)
@@ -96,6 +399,11 @@ class Playbook(ExpandMixin, BaseModel):
         play = cls(**data)
         play.read.uri = absolute_path_uri(play.read.uri, path.parent)
         play.write.uri = absolute_path_uri(play.write.uri, path.parent)
+        if isinstance(play.manifest, str):
+            play.manifest = absolute_path_uri(play.manifest, path.parent)
+        if play.schema_cache is not None and isinstance(play.schema_cache.path, str):
+            cache = play.schema_cache
+            cache.path = absolute_path(cache.path, path.parent)
         return play
 
     @classmethod
@@ -0,0 +1,178 @@
+"""
+Step reports and run manifests: what happened during a playbook run
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from typing import Any
+
+import fsspec
+import orjson
+import pandas as pd
+from pydantic import BaseModel, computed_field
+
+from runpandarun.types import SDict
+
+MB = 1024 * 1024
+
+
+def get_dtypes(df: Any) -> dict[str, str]:
+    if isinstance(df, pd.DataFrame):
+        return {str(c): str(t) for c, t in df.dtypes.items()}
+    if isinstance(df, pd.Series):
+        return {str(df.name): str(df.dtype)}
+    return {}  # e.g. intermediate groupby objects
+
+
+def get_shape(df: Any) -> tuple[int | None, int | None]:
+    shape = getattr(df, "shape", None)
+    if not isinstance(shape, tuple) or not shape:
+        return None, None
+    return shape[0], shape[1] if len(shape) > 1 else 1
+
+
+def get_size(uri: Any) -> int | None:
+    if isinstance(uri, os.PathLike):
+        uri = str(uri)
+    if not isinstance(uri, str) or uri == "-":
+        return None
+    try:
+        fs, path = fsspec.core.url_to_fs(uri)
+        return fs.size(path)
+    except Exception:
+        return None
+
+
+def get_file_checksum(uri: Any) -> str | None:
+    if isinstance(uri, os.PathLike):
+        uri = str(uri)
+    if not isinstance(uri, str) or uri == "-":
+        return None
+    checksum = hashlib.sha256()
+    try:
+        with fsspec.open(uri) as fh:
+            while data := fh.read(MB):
+                checksum.update(data)
+    except Exception:
+        return None
+    return checksum.hexdigest()
+
+
+def get_data_checksum(df: pd.DataFrame) -> str | None:
+    """
+    Checksum of the content (values, index and column names) of a DataFrame,
+    independent of its serialization
+    """
+    checksum = hashlib.sha256()
+    try:
+        checksum.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    except TypeError:  # unhashable values, e.g. lists from json
+        return None
+    columns = df.columns if isinstance(df, pd.DataFrame) else [df.name]
+    checksum.update(orjson.dumps([str(c) for c in columns]))
+    return checksum.hexdigest()
+
+
+def get_config_checksum(config: SDict) -> str:
+    data = orjson.dumps(config, default=str, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(data).hexdigest()
+
+
+class StepReport(BaseModel):
+    step: str
+    rows: int | None = None  # not for results that aren't a DataFrame or Series
+    columns: int | None = None
+    duration: float
+    bytes: int | None = None
+    added: list[str] = []
+    removed: list[str] = []
+    dtypes: dict[str, str] = {}  # changed dtypes: column -> "old -> new"
+
+    @computed_field
+    @property
+    def rows_per_second(self) -> float | None:
+        if self.duration and self.rows is not None:
+            return self.rows / self.duration
+
+    @computed_field
+    @property
+    def mb_per_second(self) -> float | None:
+        if self.duration and self.bytes is not None:
+            return self.bytes / MB / self.duration
+
+    @classmethod
+    def from_step(
+        cls,
+        step: str,
+        old: dict[str, str],
+        df: Any,
+        duration: float,
+        bytes: int | None = None,
+    ) -> "StepReport":
+        new = get_dtypes(df)
+        rows, columns = get_shape(df)
+        return cls(
+            step=step,
+            rows=rows,
+            columns=columns,
+            duration=duration,
+            bytes=bytes,
+            added=[c for c in new if c not in old] if old else [],
+            removed=[c for c in old if c not in new] if new else [],
+            dtypes={
+                c: f"{old[c]} -> {t}" for c, t in new.items() if old.get(c, t) != t
+            },
+        )
+
+    def __str__(self) -> str:
+        changes = [f"+{c}" for c in self.added] + [f"-{c}" for c in self.removed]
+        changes += [f"{c}: {t}" for c, t in self.dtypes.items()]
+        shape = f"({self.rows}, {self.columns})"
+        changes = ", ".join(changes)
+        return f"{self.step:<32} {shape:<16} {self.duration:8.3f}s  {changes}".rstrip()
+
+
+class StageReport(BaseModel):
+    stage: str
+    chunks: int
+    rows: int
+    busy: float  # seconds spent working, not waiting on other stages
+    wall: float
+
+    @computed_field
+    @property
+    def utilization(self) -> float:
+        if self.wall:
+            return min(1.0, self.busy / self.wall)
+        return 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.stage:<12} {self.chunks:>6} chunks {self.rows:>12} rows "
+            f"{self.busy:8.3f}s busy {self.utilization:7.1%}"
+        )
+
+
+class Resource(BaseModel):
+    uri: str | None = None
+    bytes: int | None = None
+    rows: int | None = None
+    columns: int | None = None
+    checksum: str | None = None  # content of the DataFrame
+    file_checksum: str | None = None
+
+
+class Manifest(BaseModel):
+    playbook: str  # checksum of the playbook config
+    started: datetime
+    duration: float
+    input: Resource
+    output: Resource
+    steps: list[StepReport]
+
+    def write(self, uri: str) -> None:
+        with fsspec.open(uri, "wb") as fh:
+            fh.write(
+                orjson.dumps(self.model_dump(mode="json"), option=orjson.OPT_INDENT_2)
+            )
@@ -0,0 +1,102 @@
+"""
+Learned schema cache: Record the dtypes of a successfully processed input
+and pass them as explicit `dtype` / `parse_dates` on later reads, which skips
+dtype inference and detects schema drift between runs.
+"""
+
+import logging
+from pathlib import Path
+from typing import Literal
+
+import orjson
+import pandas as pd
+from pydantic import BaseModel
+
+from runpandarun.exceptions import SchemaError
+from runpandarun.types import PathLike, SDict
+from runpandarun.util import get_cache_dir
+
+log = logging.getLogger(__name__)
+
+# handlers that take the schema as read options, others get it applied after
+DTYPE_HANDLERS = ("read_csv", "read_table", "read_fwf", "read_excel", "read_json")
+
+
+class Schema(BaseModel):
+    columns: list[str]
+    dtypes: dict[str, str]
+    parse_dates: list[str] = []
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame) -> "Schema":
+        dtypes = {str(c): str(t) for c, t in df.dtypes.items()}
+        return cls(
+            columns=list(dtypes),
+            dtypes={c: t for c, t in dtypes.items() if not t.startswith("datetime")},
+            parse_dates=[c for c, t in dtypes.items() if t.startswith("datetime")],
+        )
+
+    def get_read_options(self, handler: str, options: SDict) -> SDict:
+        if handler not in DTYPE_HANDLERS:
+            return options
+        options = dict(options)
+        dtype = options.get("dtype")
+        if dtype is None or isinstance(dtype, dict):  # explicit options win
+            options["dtype"] = {**self.dtypes, **(dtype or {})}
+        if self.parse_dates:
+            dates = "convert_dates" if handler == "read_json" else "parse_dates"
+            options.setdefault(dates, self.parse_dates)
+        return options
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        dtypes = {c: t for c, t in self.dtypes.items() if c in df.columns}
+        df = df.astype(dtypes)
+        for column in self.parse_dates:
+            if column in df.columns:
+                df[column] = pd.to_datetime(df[column])
+        return df
+
+    def check(self, df: pd.DataFrame) -> list[str]:
+        """
+        Describe the differences of `df` to this schema
+        """
+        other = Schema.from_df(df)
+        drift = []
+        if other.columns != self.columns:
+            drift.append(f"Columns changed: {self.columns} -> {other.columns}")
+        old = {**self.dtypes, **{c: "datetime" for c in self.parse_dates}}
+        new = {**other.dtypes, **{c: "datetime" for c in other.parse_dates}}
+        for column, dtype in new.items():
+            if column in old and old[column] != dtype:
+                drift.append(f"Column `{column}` changed: {old[column]} -> {dtype}")
+        return drift
+
+
+class SchemaCache(BaseModel):
+    """
+    `learn`: Apply a recorded schema, re-infer and record it again on drift
+    `validate`: Apply a recorded schema, raise on drift
+    """
+
+    mode: Literal["learn", "validate"] = "learn"
+    path: bool | PathLike = True
+
+    def get_path(self, key: str) -> Path:
+        return get_cache_dir(self.path, "schemas") / f"{key}.json"
+
+    def load(self, key: str) -> Schema | None:
+        path = self.get_path(key)
+        if path.exists():
+            return Schema(**orjson.loads(path.read_bytes()))
+        return None
+
+    def save(self, key: str, schema: Schema) -> None:
+        path = self.get_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(orjson.dumps(schema.model_dump(), option=orjson.OPT_INDENT_2))
+
+    def drift(self, key: str, drift: list[str]) -> None:
+        message = f"Schema drift ({self.get_path(key)}): " + "; ".join(drift)
+        if self.mode == "validate":
+            raise SchemaError(message)
+        log.warning(message)
@@ -0,0 +1,199 @@
+"""
+Incremental json / json lines parsing, to normalize huge documents into
+`DataFrame` chunks without loading the whole object tree into memory.
+"""
+
+import codecs
+import json
+from contextlib import contextmanager
+from itertools import islice
+from typing import IO, Any, Generator, Iterable, Iterator
+
+import fsspec
+import orjson
+import pandas as pd
+
+from runpandarun.compression import strip_suffix
+
+CHUNK_SIZE = 1024 * 1024  # bytes to read from the source at once
+BATCH_SIZE = 10_000  # records to normalize at once
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+
+_decoder = json.JSONDecoder()
+
+
+class JsonStreamReader:
+    """
+    A minimal pull parser on top of `json.JSONDecoder.raw_decode` that
+    navigates into objects and yields array items one by one.
+    """
+
+    def __init__(self, fh: IO):
+        self.fh = fh
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self._decode = codecs.getincrementaldecoder("utf-8")().decode
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        if self.pos > CHUNK_SIZE:  # drop consumed data
+            self.buffer = self.buffer[self.pos :]
+            self.pos = 0
+        # read at least as much as buffered to avoid quadratic re-parsing
+        data = self.fh.read(max(CHUNK_SIZE, len(self.buffer) - self.pos))
+        if not data:
+            self.eof = True
+            return False
+        if isinstance(data, bytes):
+            data = self._decode(data)
+        self.buffer += data
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next char, or "" at the end"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(
+                f"Invalid json: Expected any of `{chars}` at position {self.pos}"
+            )
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # a number at the end of the buffer could be truncated
+            if end == len(self.buffer) and self.fill():
+                continue
+            self.pos = end
+            return value
+
+    def read_all(self) -> Any:
+        while self.fill():
+            pass
+        return orjson.loads(self.buffer[self.pos :])
+
+    def items(self) -> Generator[Any, None, None]:
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.expect(",]") == "]":
+                return
+
+    def seek_key(self, key: str) -> bool:
+        """Advance within the current object to the value of `key`"""
+        self.expect("{")
+        if self.peek() == "}":
+            return False
+        while True:
+            name = self.value()
+            self.expect(":")
+            if name == key:
+                return True
+            self.value()
+            if self.expect(",}") == "}":
+                return False
+
+
+@contextmanager
+def open_json(uri: Any) -> Generator[IO, None, None]:
+    if hasattr(uri, "read"):  # already opened stream
+        yield uri
+    else:
+        with fsspec.open(uri) as fh:
+            yield fh
+
+
+def is_json_lines(uri: Any) -> bool:
+    name = strip_suffix(str(getattr(uri, "name", uri)).lower())
+    return name.endswith(JSONL_SUFFIXES)
+
+
+def iter_json_lines(fh: IO) -> Generator[Any, None, None]:
+    for line in fh:
+        line = line.strip()
+        if line:
+            yield orjson.loads(line)
+
+
+def batched(records: Iterable[Any], size: int) -> Iterator[list[Any]]:
+    records = iter(records)
+    while batch := list(islice(records, size)):
+        yield batch
+
+
+def iter_json_normalize(
+    uri: Any,
+    record_path: str | list[str] | None = None,
+    lines: bool | None = None,
+    chunksize: int | None = BATCH_SIZE,
+    **kwargs,
+) -> Generator[pd.DataFrame, None, None]:
+    """
+    Parse json (or json lines) records incrementally and yield
+    `pd.json_normalize` results for batches of `chunksize` records.
+
+    For a json object, the first key of `record_path` points to the array
+    that is streamed, the remaining keys are applied per record just as
+    `pd.json_normalize` would do. For json lines or a top-level array the
+    whole `record_path` is applied per record. `meta` fields of a top-level
+    object are only available after parsing the whole document, so this
+    case falls back to loading it at once.
+    """
+    if isinstance(record_path, str):
+        record_path = [record_path]
+    if lines is None:
+        lines = is_json_lines(uri)
+    chunksize = chunksize or BATCH_SIZE
+    with open_json(uri) as fh:
+        if lines:
+            records = iter_json_lines(fh)
+        else:
+            reader = JsonStreamReader(fh)
+            if reader.peek() == "[":
+                records = reader.items()
+            elif record_path and not kwargs.get("meta"):
+                if not reader.seek_key(record_path[0]):
+                    raise KeyError(record_path[0])
+                records = reader.items()
+                record_path = record_path[1:] or None
+            else:
+                records = [reader.read_all()]
+        start = 0
+        for batch in batched(records, chunksize):
+            df = pd.json_normalize(batch, record_path=record_path, **kwargs)
+            df.index = pd.RangeIndex(start, start + len(df))
+            start += len(df)
+            yield df
+
+
+def read_json_normalize(
+    uri: Any, chunksize: int | None = None, **kwargs
+) -> pd.DataFrame | Iterator[pd.DataFrame]:
+    chunks = iter_json_normalize(uri, chunksize=chunksize, **kwargs)
+    if chunksize:
+        return chunks
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks)
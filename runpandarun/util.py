@@ -12,6 +12,7 @@ import pandas as pd
 import rigour
 from rigour.mime import normalize_mimetype
 
+from runpandarun.compression import strip_suffix
 from runpandarun.types import PathLike
 
 try:
@@ -20,35 +21,33 @@ except ImportError:
     investigraph = None
 
 
+SAFE_NAMESPACE = {
+    "pd": pd,
+    "np": np,
+    "str": str,
+    "int": int,
+    "float": float,
+    "dict": dict,
+    "list": list,
+    "tuple": tuple,
+    "None": None,
+    "True": True,
+    "False": False,
+    "len": len,
+    "hasattr": hasattr,
+    "getattr": getattr,
+    "isinstance": isinstance,
+    "datetime": datetime,
+    "timedelta": timedelta,
+    "banal": banal,
+    "normality": normality,
+    "rigour": rigour,
+    "investigraph": investigraph,
+}
+
+
 def safe_eval(value):
-    return eval(
-        str(value),
-        {
-            "__builtins__": {
-                "pd": pd,
-                "np": np,
-                "str": str,
-                "int": int,
-                "float": float,
-                "dict": dict,
-                "list": list,
-                "tuple": tuple,
-                "None": None,
-                "True": True,
-                "False": False,
-                "len": len,
-                "hasattr": hasattr,
-                "getattr": getattr,
-                "isinstance": isinstance,
-                "datetime": datetime,
-                "timedelta": timedelta,
-                "banal": banal,
-                "normality": normality,
-                "rigour": rigour,
-                "investigraph": investigraph,
-            }
-        },
-    )
+    return eval(str(value), {"__builtins__": SAFE_NAMESPACE})
 
 
 def expandvars(data: Any) -> dict[str, Any]:
@@ -75,6 +74,16 @@ def absolute_path_uri(path: PathLike, base: PathLike | None = "") -> str:
     return path
 
 
+def get_cache_dir(cache: bool | PathLike, name: str) -> Path:
+    """
+    `cache` is a directory or `True` for the user cache directory
+    """
+    if cache is True:
+        root = os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")
+        return Path(root) / "runpandarun" / name
+    return Path(cache)
+
+
 def getattr_by_path(thing: Any, path: str) -> Any:
     # getattr(foo, "bar.baz")
     for p in path.split("."):
@@ -83,5 +92,5 @@ def getattr_by_path(thing: Any, path: str) -> Any:
 
 
 def guess_mimetype(path: PathLike) -> str:
-    mimetype, _ = mimetypes.guess_type(path)
+    mimetype, _ = mimetypes.guess_type(strip_suffix(str(path)))
     return normalize_mimetype(mimetype)
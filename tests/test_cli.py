@@ -46,3 +46,71 @@ def test_cli_invalid_path(fixtures_path: Path):
 
     result = runner.invoke(cli, [str(fixtures_path)])
     assert result.exit_code == 1
+
+
+def test_cli_dry_run(fixtures_path: Path):
+    config = str(fixtures_path / "spec.yml")
+    result = runner.invoke(cli, [config, "--sample", "10"])
+    assert result.exit_code == 0
+    assert "DataFrame.sort_values" in result.stdout
+    assert "(10, 4)" in result.stdout
+
+    result = runner.invoke(cli, [config, "--dry-run"])
+    assert result.exit_code == 0
+    assert "(9999, 4)" in result.stdout
+
+
+def test_cli_pipeline(tmp_path: Path, fixtures_path: Path):
+    args = [
+        str(fixtures_path / "applymap.yml"),
+        "-o",
+        str(tmp_path / "out.csv"),
+        "--pipeline",
+    ]
+    result = runner.invoke(cli, args)
+    assert result.exit_code == 0
+    assert "transform" in result.stderr
+    assert (tmp_path / "out.csv").exists()
+
+    result = runner.invoke(cli, [*args, "--manifest", str(tmp_path / "m.json")])
+    assert result.exit_code == 1
+
+
+def test_cli_run_many(tmp_path: Path, fixtures_path: Path):
+    config = "operations:\n  - handler: %s\nwrite:\n  uri: %s\n"
+    a, b = tmp_path / "a.yml", tmp_path / "b.yml"
+    a.write_text(config % ("DataFrame.dropna", tmp_path / "a.csv"))
+    b.write_text(config % ("DataFrame.drop_duplicates", tmp_path / "b.csv"))
+    args = [str(a), str(b), "-i", str(fixtures_path / "testdata.csv")]
+    result = runner.invoke(cli, args)
+    assert result.exit_code == 0
+    assert (tmp_path / "a.csv").exists()
+    assert (tmp_path / "b.csv").exists()
+
+    # different read configs
+    result = runner.invoke(cli, [str(fixtures_path / "spec.yml"), *args])
+    assert result.exit_code == 1
+
+    result = runner.invoke(cli, [*args, "--pipeline"])
+    assert result.exit_code == 1
+
+    result = runner.invoke(cli, [*args, "-o", str(tmp_path / "out.csv")])
+    assert result.exit_code == 1
+
+    # both write to stdout
+    play = tmp_path / "dropna.yml"
+    play.write_text("operations:\n  - handler: DataFrame.dropna\n")
+    args = [
+        str(play),
+        str(fixtures_path / "applymap.yml"),
+        "-i",
+        str(fixtures_path / "testdata.csv"),
+    ]
+    result = runner.invoke(cli, args)
+    assert result.exit_code == 1
+    assert result.stdout == ""
+
+    # dry runs don't write
+    result = runner.invoke(cli, [*args, "--sample", "5"])
+    assert result.exit_code == 0
+    assert "applymap.yml" in result.stdout
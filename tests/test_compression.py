@@ -0,0 +1,132 @@
+import sys
+from io import BytesIO
+
+import pandas as pd
+import pytest
+from typer.testing import CliRunner
+
+from runpandarun import io, parallel
+from runpandarun.cli import cli
+from runpandarun.compression import sniff
+
+METHODS = {"gzip": "gz", "bz2": "bz2", "xz": "xz", "zstd": "zst", "lz4": "lz4"}
+
+
+@pytest.mark.parametrize("method,suffix", METHODS.items())
+def test_compression_roundtrip(method, suffix, fixtures_path, tmp_path):
+    if method == "zstd":
+        pytest.importorskip("zstandard")
+    if method == "lz4":
+        pytest.importorskip("lz4")
+    df = io.read_pandas(fixtures_path / "testdata.csv")
+
+    # inferred by extension
+    path = tmp_path / f"testdata.csv.{suffix}"
+    io.write_pandas(df, path, index=False)
+    with open(path, "rb") as fh:
+        assert sniff(fh) == method
+    pd.testing.assert_frame_equal(io.read_pandas(path), df)
+
+    # explicit on streams, inferred by magic bytes
+    out = BytesIO()
+    io.write_pandas(df, out, compression=method, index=False)
+    out.seek(0)
+    pd.testing.assert_frame_equal(io.read_pandas(out), df)
+
+    # handler config
+    path = tmp_path / "testdata.csv"
+    handler = io.WriteHandler(uri=path, compression=method, options={"index": False})
+    handler.handle(df)
+    with open(path, "rb") as fh:
+        assert sniff(fh) == method
+    handler = io.ReadHandler(uri=path, compression=method)
+    pd.testing.assert_frame_equal(handler.handle(), df)
+
+
+def test_compression_options(fixtures_path, tmp_path):
+    pytest.importorskip("zstandard")
+    df = io.read_pandas(fixtures_path / "testdata.csv")
+    path = tmp_path / "testdata.csv.zst"
+    compression = {"method": "zstd", "level": 19, "threads": 2}
+    io.write_pandas(df, path, compression=compression, index=False)
+    pd.testing.assert_frame_equal(io.read_pandas(path), df)
+
+    # chunked reads keep the stream open
+    chunks = io.read_pandas(path, chunksize=3000)
+    assert [len(c) for c in chunks] == [3000, 3000, 3000, 1000]
+
+    with pytest.raises(ValueError):
+        io.write_pandas(df, tmp_path / "foo", compression="foo")
+
+
+def test_compression_pandas(fixtures_path, tmp_path):
+    # archives are handled by pandas
+    df = io.read_pandas(fixtures_path / "testdata.csv")
+    path = tmp_path / "testdata.csv.zip"
+    io.write_pandas(df, path, index=False)
+    pd.testing.assert_frame_equal(io.read_pandas(path), df)
+    pd.testing.assert_frame_equal(io.read_pandas(path, compression="zip"), df)
+    path = tmp_path / "testdata.csv"
+    handler = io.WriteHandler(
+        uri=path, compression={"method": "zip"}, options={"index": False}
+    )
+    handler.handle(df)
+    handler = io.ReadHandler(uri=path, compression={"method": "zip"})
+    pd.testing.assert_frame_equal(handler.handle(), df)
+
+    # pandas style options
+    fast, best = tmp_path / "fast.csv.gz", tmp_path / "best.csv.gz"
+    io.write_pandas(df, fast, compression={"method": "gzip", "compresslevel": 1})
+    io.write_pandas(df, best, compression={"method": "gzip", "compresslevel": 9})
+    assert fast.stat().st_size > best.stat().st_size
+    with pytest.raises(ValueError, match="foo"):
+        io.write_pandas(df, fast, compression={"method": "gzip", "foo": 1})
+
+
+def test_compression_large_local(monkeypatch, fixtures_path, tmp_path):
+    # no memory mapping of the compressed file for large inputs
+    monkeypatch.setattr(parallel, "PARALLEL_MIN_SIZE", 1)
+    df = io.read_pandas(fixtures_path / "testdata.csv")
+    path = tmp_path / "testdata.csv.gz"
+    io.write_pandas(df, path, index=False)
+    handler = io.ReadHandler(uri=path)
+    assert "memory_map" not in handler.get_options()
+    pd.testing.assert_frame_equal(handler.handle(), df)
+
+    path = tmp_path / "testdata.csv"
+    io.write_pandas(df, path, compression="gzip", index=False)
+    handler = io.ReadHandler(uri=path, compression="gzip")
+    assert "memory_map" not in handler.get_options()
+    pd.testing.assert_frame_equal(handler.handle(), df)
+
+    # explicit options don't apply to the decompressed stream
+    res = io.read_pandas(path, compression="gzip", memory_map=True, parallel=True)
+    pd.testing.assert_frame_equal(res, df)
+
+
+def test_compression_json_lines(fixtures_path, tmp_path):
+    df = io.read_pandas(fixtures_path / "testdata.json", handler="read_json")
+    path = tmp_path / "testdata.jsonl.gz"
+    io.write_pandas(
+        df, path, "to_json", orient="records", lines=True, date_format="iso"
+    )
+    assert len(io.read_pandas(path, "read_json", lines=True)) == 10000
+    res = io.read_pandas(path, "json_normalize", chunksize=5000)
+    assert [len(c) for c in res] == [5000, 5000]
+    assert io.ReadHandler(uri=tmp_path / "testdata.csv.zst").get_name() == "read_csv"
+
+
+def test_compression_cli_stdio(monkeypatch, fixtures_path, tmp_path):
+    runner = CliRunner()
+    path = tmp_path / "out.csv"
+    config = str(fixtures_path / "spec.yml")
+    result = runner.invoke(cli, [config, "-o", str(path), "-oc", "gzip"])
+    assert result.exit_code == 0
+    with open(path, "rb") as fh:
+        assert sniff(fh) == "gzip"
+
+    # compressed stdin is detected
+    with open(path, "rb") as fh:
+        monkeypatch.setattr(sys, "stdin", type("stdin", (), {"buffer": fh}))
+        df = io.read_pandas("-")
+    assert len(df) == 9999
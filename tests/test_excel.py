@@ -0,0 +1,78 @@
+import pandas as pd
+import pytest
+
+from runpandarun import excel, io
+
+
+@pytest.fixture(scope="module")
+def workbook(tmp_path_factory):
+    path = tmp_path_factory.mktemp("excel") / "workbook.xlsx"
+    df = pd.DataFrame({"a": range(100), "b": ["x", "y"] * 50})
+    with pd.ExcelWriter(path) as writer:
+        df.to_excel(writer, sheet_name="one", index=False)
+        df.head(10).to_excel(writer, sheet_name="two", index=False)
+        df.head(5).to_excel(writer, sheet_name="three", index=False)
+    return path
+
+
+def test_excel_read(workbook):
+    df = io.read_pandas(workbook, "read_excel")
+    assert len(df) == 100
+    assert list(df.columns) == ["a", "b"]
+
+    sheets = io.read_pandas(workbook, "read_excel", sheet_name=None, workers=2)
+    assert list(sheets) == ["one", "two", "three"]
+    assert [len(df) for df in sheets.values()] == [100, 10, 5]
+    sheets = io.read_pandas(workbook, "read_excel", sheet_name=["three", 1])
+    assert list(sheets) == ["three", 1]
+    assert [len(df) for df in sheets.values()] == [5, 10]
+
+    df = io.read_pandas(workbook, "read_excel", engine="openpyxl", sheet_name="two")
+    assert len(df) == 10
+
+    # sampling applies to each sheet
+    sheets = io.read_pandas_sample(workbook, "read_excel", n=3, sheet_name=None)
+    assert [len(df) for df in sheets.values()] == [3, 3, 3]
+    sheets = io.read_pandas_sample(
+        workbook, "read_excel", frac=0.5, seed=1, sheet_name=["one", "two"]
+    )
+    assert [len(df) for df in sheets.values()] == [50, 5]
+
+    with open(workbook, "rb") as fh:
+        assert len(io.read_pandas(fh, "read_excel")) == 100
+
+
+def test_excel_cache(monkeypatch, workbook, tmp_path):
+    cache = tmp_path / "cache"
+    df = io.read_pandas(workbook, "read_excel", cache=cache)
+    assert len(list(cache.glob("*.json"))) == 1
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("Should be cached")
+
+    monkeypatch.setattr(excel, "read_sheets", fail)
+    pd.testing.assert_frame_equal(
+        io.read_pandas(workbook, "read_excel", cache=cache), df
+    )
+    with pytest.raises(RuntimeError):  # different options
+        io.read_pandas(workbook, "read_excel", cache=cache, nrows=5)
+    monkeypatch.undo()
+
+    sheets = io.read_pandas(workbook, "read_excel", cache=cache, sheet_name=None)
+    monkeypatch.setattr(excel, "read_sheets", fail)
+    cached = io.read_pandas(workbook, "read_excel", cache=cache, sheet_name=None)
+    assert list(cached) == list(sheets)
+    for name, df in sheets.items():
+        pd.testing.assert_frame_equal(cached[name], df)
+
+    # sheets that can't be stored as parquet are not cached
+    monkeypatch.undo()
+    path = tmp_path / "mixed.xlsx"
+    pd.DataFrame({"a": [1, "x", 2.5]}).to_excel(path, index=False)
+    df = io.read_pandas(path, "read_excel", cache=cache)
+    assert df["a"].tolist() == [1, "x", 2.5]
+    assert len(list(cache.glob("*.json"))) == 2  # the previous reads only
+    assert not list(cache.glob("**/*.pkl"))
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert excel.get_cache_dir(True, "excel") == tmp_path / "runpandarun" / "excel"
@@ -139,3 +139,39 @@ def test_io_sql(con):
 def test_io_invalid():
     with pytest.raises(ValidationError):
         io.ReadHandler(uri="-", handler="foo")
+
+
+def test_io_read_sample(fixtures_path, tmp_path, con):
+    df = io.read_pandas_sample(fixtures_path / "testdata.csv", n=10)
+    assert len(df) == 10
+    df = io.read_pandas_sample(fixtures_path / "testdata.csv", frac=0.1, seed=1)
+    assert 800 < len(df) < 1200
+    assert list(df.columns) == ["state", "city", "amount", "date"]
+    # skipfooter can't be pushed down
+    df = io.read_pandas_sample(fixtures_path / "testdata.csv", n=10, skipfooter=1)
+    assert len(df) == 10
+
+    df = io.read_pandas_sample(
+        fixtures_path / "lobbyregister.json",
+        handler="json_normalize",
+        n=5,
+        record_path="results",
+    )
+    assert len(df) == 5
+
+    df = io.read_pandas_sample(con, handler="read_sql", n=5, sql="test_table")
+    assert len(df) == 5
+    df = io.read_pandas_sample(
+        con, handler="read_sql", n=5, sql="SELECT * FROM test_table;"
+    )
+    assert len(df) == 5
+
+    pytest.importorskip("pyarrow")
+    df = io.read_pandas(fixtures_path / "testdata.csv")
+    df.to_parquet(tmp_path / "testdata.parquet", row_group_size=1000)
+    sample = io.read_pandas_sample(tmp_path / "testdata.parquet", "read_parquet", n=5)
+    pd.testing.assert_frame_equal(sample, df.head(5))
+    sample = io.read_pandas_sample(
+        tmp_path / "testdata.parquet", "read_parquet", frac=0.2
+    )
+    assert len(sample) == 2000
@@ -0,0 +1,103 @@
+import mmap
+
+import pandas as pd
+
+from runpandarun import io, parallel
+
+
+def test_parallel_split_lines(tmp_path):
+    path = tmp_path / "quoted.csv"
+    path.write_bytes(b'"a\nb",c\n1,"x\ny"\n2,z\n3,"q""\nq"\n4,w\n')
+    with (
+        open(path, "rb") as fh,
+        mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+    ):
+        header_end, offsets = parallel.split_lines(mm, 10)
+        assert mm[:header_end] == b'"a\nb",c\n'
+        assert offsets[0] == header_end
+        assert offsets[-1] == len(mm)
+        lines = [mm[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+        assert lines == [b'1,"x\ny"\n', b"2,z\n", b'3,"q""\nq"\n', b"4,w\n"]
+
+        header_end, offsets = parallel.split_lines(mm, 2, header=False)
+        assert header_end == 0
+        assert len(offsets) == 3
+
+
+def test_parallel_read_csv(fixtures_path, tmp_path):
+    expected = pd.read_csv(fixtures_path / "testdata.csv")
+    df = parallel.read_csv_parallel(fixtures_path / "testdata.csv", workers=4)
+    pd.testing.assert_frame_equal(df, expected)
+
+    df = io.read_pandas(fixtures_path / "testdata.csv", parallel=3, index_col="city")
+    pd.testing.assert_frame_equal(
+        df, pd.read_csv(fixtures_path / "testdata.csv", index_col="city")
+    )
+
+    path = tmp_path / "quoted.csv"
+    expected["city"] = expected["city"] + '\n"quoted", newline'
+    expected.to_csv(path, index=False)
+    df = io.read_pandas(path.as_uri(), parallel=8)
+    pd.testing.assert_frame_equal(df, expected)
+
+    # unsupported options fall back to a regular read
+    df = io.read_pandas(path, parallel=True, nrows=10)
+    assert len(df) == 10
+
+    path = tmp_path / "empty.csv"
+    path.write_text("")
+    assert parallel.local_path(path.as_uri()) == path
+    assert parallel.local_path("s3://bucket/data.csv") is None
+    assert parallel.local_path("-") is None
+
+
+def test_parallel_read_csv_dtypes(tmp_path):
+    # later ranges must not infer different dtypes than a serial read
+    path = tmp_path / "mixed.csv"
+    rows = "".join(f"{i},{i},2020-01-01\n" for i in range(10000))
+    path.write_text("a,b,c\n" + rows + "x,1.5,2020-01-02\n" * 10 + ",,\n")
+    for options in (
+        {},
+        {"parse_dates": ["c"]},
+        {"dtype": {"b": "float64"}},
+        {"header": 0},
+        {"header": 0, "names": ["x", "y", "z"]},
+        {"header": None},
+    ):
+        df = parallel.read_csv_parallel(path, workers=8, **options)
+        pd.testing.assert_frame_equal(df, pd.read_csv(path, **options))
+
+    # no serial fallback for a regular header
+    path.write_text("a,b\n" + "".join(f"{i},{i}\n" for i in range(20000)))
+    calls = []
+
+    def read(arg, **kwargs):
+        calls.append(arg)
+        return pd.read_csv(arg, **kwargs)
+
+    for options in ({"header": 0}, {"header": 0, "names": ["x", "y"]}):
+        df = parallel.read_csv_parallel(path, read, workers=8, **options)
+        pd.testing.assert_frame_equal(df, pd.read_csv(path, **options))
+    assert path not in calls
+
+    path.write_text("a,b\n" + rows.replace(",2020-01-01", ""))
+    df = parallel.read_csv_parallel(path, workers=4, index_col="a")
+    pd.testing.assert_frame_equal(df, pd.read_csv(path, index_col="a"))
+
+
+def test_parallel_auto_select(monkeypatch, fixtures_path):
+    handler = io.ReadHandler(uri=fixtures_path / "testdata.csv")
+    assert handler.get_options() == {}
+
+    monkeypatch.setattr(parallel, "PARALLEL_MIN_SIZE", 1)
+    monkeypatch.setattr(parallel.os, "cpu_count", lambda: 4)
+    assert handler.get_options()["parallel"] is True
+    assert len(handler.handle()) == 10000
+
+    handler = io.ReadHandler(
+        uri=fixtures_path / "testdata.csv", options={"skipfooter": 1}
+    )
+    assert handler.get_options() == {"skipfooter": 1, "memory_map": True}
+
+    handler = io.ReadHandler(uri="http://localhost/testdata.csv")
+    assert handler.get_options() == {}
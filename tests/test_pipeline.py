@@ -0,0 +1,108 @@
+import pandas as pd
+import pytest
+
+from runpandarun import Playbook
+from runpandarun.exceptions import SpecError
+from runpandarun.schema import SchemaCache
+
+CONFIG = """
+read:
+  uri: %s
+  options:
+    chunksize: 1000
+operations:
+  - handler: Series.str.lower
+    column: state
+  - handler: DataFrame.assign
+    options:
+      city_id: "lambda x: x['state'] + '-' + x['city'].map(normality.slugify)"
+patch:
+  city:
+    options:
+      - match: Zarizri
+        value: Zar1zr1
+write:
+  uri: %s
+  options:
+    index: false
+"""
+
+
+def test_pipeline(fixtures_path, tmp_path):
+    source = fixtures_path / "testdata.csv"
+    play = Playbook.from_string(CONFIG % (source, tmp_path / "out.csv"))
+    expected = play.run()
+    assert len(expected) == 10000
+
+    reports = play.run_pipeline()
+    assert [r.stage for r in reports] == ["read", "transform", "write"]
+    for report in reports:
+        assert report.chunks == 10
+        assert report.rows == 10000
+        assert 0 <= report.utilization <= 1
+    assert "transform" in str(reports[1])
+    df = pd.read_csv(tmp_path / "out.csv")
+    pd.testing.assert_frame_equal(df, expected.reset_index(drop=True))
+
+    # compressed stream
+    play.write.uri = tmp_path / "out.csv.gz"
+    play.run_pipeline(queue_size=1)
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / "out.csv.gz"), df)
+
+    # archives are written at once
+    play.write.uri = tmp_path / "archive.csv"
+    play.write.compression = "zip"
+    play.run_pipeline()
+    res = pd.read_csv(tmp_path / "archive.csv", compression="zip")
+    pd.testing.assert_frame_equal(res, df)
+    play.write.compression = None
+
+    # json lines stream
+    play.write.uri = tmp_path / "out.jsonl"
+    play.write.handler = "to_json"
+    play.write.options = {"orient": "records", "lines": True}
+    play.run_pipeline()
+    assert len(pd.read_json(tmp_path / "out.jsonl", lines=True)) == 10000
+
+    # collected and written at once
+    play.write.uri = tmp_path / "out.xlsx"
+    play.write.handler = None
+    play.write.options = {"index": False}
+    play.run_pipeline()
+    assert len(pd.read_excel(tmp_path / "out.xlsx")) == 10000
+
+    # not chunked input
+    play.read.options = {}
+    reports = play.run_pipeline()
+    assert reports[0].chunks == 1
+
+
+def test_pipeline_sql(fixtures_path, tmp_path):
+    con = f"sqlite:///{tmp_path}/data.db"
+    play = Playbook.from_string(CONFIG % (fixtures_path / "testdata.csv", con))
+    play.write.options = {"sql": "out", "index": False}
+    play.run_pipeline()
+    assert len(pd.read_sql("out", con)) == 10000
+
+
+def test_pipeline_error(fixtures_path, tmp_path):
+    play = Playbook.from_string(
+        CONFIG % (fixtures_path / "testdata.csv", tmp_path / "out.csv")
+    )
+    play.operations[0].column = "foo"
+    with pytest.raises(KeyError):
+        play.run_pipeline(queue_size=1)
+
+    play.read.uri = tmp_path / "missing.csv"
+    with pytest.raises(FileNotFoundError):
+        play.run_pipeline()
+
+    # not supported, instead of silently ignoring them
+    play.read.uri = fixtures_path / "testdata.csv"
+    play.manifest = True
+    with pytest.raises(SpecError):
+        play.run_pipeline()
+    play.manifest = False
+    play.schema_cache = SchemaCache()
+    with pytest.raises(SpecError):
+        play.run_pipeline()
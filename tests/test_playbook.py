@@ -1,7 +1,13 @@
+import json
+from hashlib import sha256
+
+import numpy as np
 import pandas as pd
 import pytest
 
-from runpandarun import Playbook, read_pandas
+from runpandarun import Playbook, playbook, read_pandas
+from runpandarun.exceptions import SpecError
+from runpandarun.playbook import get_common_prefix
 
 
 def test_playbook(fixtures_path):
@@ -37,3 +43,171 @@ def test_playbook_json(fixtures_path):
     df = play.read.handle()
     assert len(df) == 17
     assert "registerNumber" in df.columns
+
+
+def test_playbook_intermediate_results(fixtures_path):
+    # steps may return other objects than DataFrames
+    source = fixtures_path / "testdata.csv"
+    play = Playbook(
+        read={"uri": str(source)},
+        operations=[
+            {"handler": "DataFrame.groupby", "options": {"by": "state"}},
+            {"handler": "DataFrame.count"},
+        ],
+    )
+    df = play.run()
+    assert df.index.name == "state"
+    reports = play.dry_run()
+    assert reports[1].rows is None
+    assert reports[2].rows == len(df)
+
+    play = Playbook(
+        read={"uri": str(source)}, operations=[{"handler": "DataFrame.sum"}]
+    )
+    assert isinstance(play.run(), pd.Series)
+    assert play.dry_run()[-1].columns == 1
+
+
+def test_playbook_dry_run(fixtures_path):
+    play = Playbook.from_yaml(fixtures_path / "spec.yml")
+    reports = play.dry_run(sample=100)
+    assert [r.step for r in reports] == [
+        "read",
+        "DataFrame.rename",
+        "Series.str.lower",
+        "DataFrame.assign",
+        "DataFrame.set_index",
+        "DataFrame.sort_values",
+        "patch",
+    ]
+    assert reports[0].rows == 100
+    assert reports[1].added == reports[1].removed == []
+    assert reports[3].added == ["city_id"]
+    assert reports[4].removed == ["city_id"]
+    assert "DataFrame.rename" in str(reports[1])
+
+
+def test_playbook_manifest(monkeypatch, fixtures_path, tmp_path):
+    play = Playbook.from_yaml(fixtures_path / "spec.yml")
+    play.write.uri = str(tmp_path / "out.csv")
+
+    # sizes are only looked up for the manifest
+    def fail(*args, **kwargs):
+        raise RuntimeError("Should not be called")
+
+    with monkeypatch.context() as m:
+        m.setattr(playbook, "get_size", fail)
+        play.run(write=True)
+
+    play.manifest = True
+    df = play.run(write=True)
+    with open(tmp_path / "out.csv.manifest.json") as fh:
+        manifest = json.load(fh)
+    assert manifest["input"]["rows"] == 9999
+    assert manifest["input"]["bytes"] == (fixtures_path / "testdata.csv").stat().st_size
+    assert manifest["output"]["rows"] == len(df)
+    assert manifest["output"]["bytes"] == (tmp_path / "out.csv").stat().st_size
+    with open(tmp_path / "out.csv", "rb") as fh:
+        assert manifest["output"]["file_checksum"] == sha256(fh.read()).hexdigest()
+    assert [s["step"] for s in manifest["steps"]][-1] == "write"
+    assert manifest["steps"][0]["mb_per_second"] > 0
+    assert manifest["steps"][0]["rows_per_second"] > 0
+
+    # same config and data lead to the same checksums
+    play.manifest = str(tmp_path / "manifest.json")
+    play.run(write=True)
+    with open(tmp_path / "manifest.json") as fh:
+        manifest2 = json.load(fh)
+    assert manifest["playbook"] == manifest2["playbook"]
+    assert manifest["output"]["checksum"] == manifest2["output"]["checksum"]
+    play.operations = play.operations[:1]
+    play.run(write=True)
+    with open(tmp_path / "manifest.json") as fh:
+        manifest2 = json.load(fh)
+    assert manifest["playbook"] != manifest2["playbook"]
+    assert manifest["output"]["checksum"] != manifest2["output"]["checksum"]
+
+    play.manifest = True
+    play.write.uri = "-"
+    with pytest.raises(SpecError):
+        play.run(write=True)
+
+
+def test_playbook_run_many(fixtures_path, tmp_path):
+    config = """
+    read:
+      uri: %s
+    operations:
+      - handler: Series.str.lower
+        column: state
+      - handler: %s
+    write:
+      uri: %s
+    """
+    source = fixtures_path / "testdata.csv"
+    a = Playbook.from_string(
+        config % (source, "DataFrame.drop_duplicates", tmp_path / "a.csv")
+    )
+    b = Playbook.from_string(config % (source, "DataFrame.dropna", tmp_path / "b.csv"))
+    assert get_common_prefix([a, b]) == 1
+    assert get_common_prefix([a, a]) == 2
+    assert get_common_prefix([a, Playbook()]) == 0
+
+    df_a, df_b = Playbook.run_many([a, b], write=True)
+    pd.testing.assert_frame_equal(df_a, a.run())
+    pd.testing.assert_frame_equal(df_b, b.run())
+    assert (tmp_path / "a.csv").exists()
+    assert (tmp_path / "b.csv").exists()
+
+    # the shared input is not altered by the playbooks
+    df = read_pandas(source)
+    spec = Playbook.from_yaml(fixtures_path / "spec.yml")
+    res = Playbook.run_many([spec, a], df)
+    assert df["state"][0].isupper()
+    assert res[0].index.name == "city_id"
+    assert res[1]["state"][0].islower()
+
+    # ...neither by a shared prefix
+    res = Playbook.run_many([a, b], df)
+    assert df["state"][0].isupper()
+    assert res[0]["state"][0].islower()
+
+    # different inputs can't be shared
+    with pytest.raises(SpecError):
+        Playbook.run_many([a, spec])
+
+    # neither can the same target
+    with pytest.raises(SpecError):
+        Playbook.run_many([a, a], write=True)
+    assert len(Playbook.run_many([a, a])) == 2
+
+    assert Playbook.run_many([]) == []
+
+
+def test_playbook_expr(fixtures_path):
+    config = """
+read:
+  uri: %s
+operations:
+  - handler: expr
+    options:
+      assign:
+        double: amount * 2
+        quadruple: double * 2
+        pi: amount * @np.pi
+      filter: amount > 0 and state == 'KY'
+""" % (fixtures_path / "testdata.csv")
+    play = Playbook.from_string(config)
+    orig = play.read.handle()
+    df = play.run(orig)
+    assert len(df) == len(orig[(orig["amount"] > 0) & (orig["state"] == "KY")])
+    assert (df["quadruple"] == df["amount"] * 4).all()
+    assert np.allclose(df["pi"], df["amount"] * np.pi)
+    assert "double" not in orig.columns
+
+    # the expressions are restricted to the `safe_eval` namespace
+    play = Playbook.from_string(
+        "operations:\n  - handler: expr\n    options:\n      filter: \"@os.name == 'posix'\""
+    )
+    with pytest.raises(Exception, match="os"):
+        play.run(orig)
@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+from runpandarun import Playbook
+from runpandarun.exceptions import SchemaError
+from runpandarun.playbook import Operation
+from runpandarun.schema import Schema, SchemaCache
+
+
+def test_schema():
+    df = pd.DataFrame(
+        {"a": [1, 2], "b": ["x", "y"], "c": pd.to_datetime(["2020-01-01"] * 2)}
+    )
+    schema = Schema.from_df(df)
+    assert schema.columns == ["a", "b", "c"]
+    assert schema.dtypes["a"] == "int64"
+    assert schema.parse_dates == ["c"]
+    assert schema.check(df) == []
+    assert len(schema.check(df.astype({"a": float}))) == 1
+    assert len(schema.check(df[["a", "b"]])) == 1
+
+    options = schema.get_read_options("read_csv", {"dtype": {"a": "float64"}})
+    assert options["dtype"] == {"a": "float64", "b": schema.dtypes["b"]}
+    assert options["parse_dates"] == ["c"]
+    options = schema.get_read_options("read_json", {})
+    assert options["convert_dates"] == ["c"]
+    assert schema.get_read_options("read_parquet", {}) == {}
+    assert schema.apply(df.astype({"a": float})).dtypes["a"] == "int64"
+
+
+def test_schema_cache(tmp_path, caplog):
+    uri = tmp_path / "data.csv"
+    uri.write_text("id,amount,date\n1,2.5,2020-01-01\n2,3,2020-01-02\n")
+    play = Playbook(
+        read={"uri": str(uri), "options": {"parse_dates": ["date"]}},
+        schema_cache={"path": str(tmp_path / "schemas")},
+    )
+    key = play.get_schema_key()
+    assert play.schema_cache.load(key) is None
+
+    # failed runs don't record a schema
+    play.operations = [Operation(handler="DataFrame.drop", options={"columns": "foo"})]
+    with pytest.raises(KeyError):
+        play.run()
+    assert play.schema_cache.load(key) is None
+    play.operations = []
+
+    df = play.run()
+    schema = play.schema_cache.load(key)
+    assert schema.parse_dates == ["date"]
+    assert schema.dtypes["amount"] == "float64"
+
+    # repeat reads use the recorded schema
+    res, schema = play.read_input()
+    assert res.dtypes.equals(df.dtypes)
+    assert schema is None  # nothing new to record
+    res, _ = play.read_input(sample=1)
+    assert res.dtypes.equals(df.dtypes)
+
+    # drift: re-infer and record again
+    uri.write_text("id,amount,date\n1,a,2020-01-01\n2,b,2020-01-02\n")
+    with caplog.at_level("WARNING"):
+        df = play.run()
+    assert "Schema drift" in caplog.text
+    assert df["amount"].tolist() == ["a", "b"]
+    assert play.schema_cache.load(key).dtypes["amount"] != "float64"
+
+    # validate: raise on drift
+    play.schema_cache.mode = "validate"
+    assert len(play.run()) == 2
+    uri.write_text("id,amount\n1,2\n")
+    with pytest.raises(SchemaError):
+        play.read_input()
+
+    # `true` uses the user cache dir
+    play = Playbook(schema_cache=True)
+    assert play.schema_cache == SchemaCache()
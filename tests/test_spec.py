@@ -55,6 +55,12 @@ def test_spec_invalid():
         Operation(handler="Series.map")
     with pytest.raises(SpecError):
         Operation()
+    with pytest.raises(SpecError):  # missing expressions
+        Operation(handler="expr")
+    with pytest.raises(SpecError, match="^The `expr` handler takes"):
+        Operation(handler="expr", options={"foo": "a > 0"})
+    with pytest.raises(SpecError):
+        Operation(handler="expr", options={"filter": "a > 0"}, column="a")
     with pytest.raises(ValidationError):
         Operation(handler="DataFrame.map", foo="bar")
     with pytest.raises(ValidationError):
@@ -0,0 +1,96 @@
+from io import BytesIO
+
+import orjson
+import pandas as pd
+import pytest
+
+from runpandarun import io
+from runpandarun.stream import CHUNK_SIZE, JsonStreamReader, iter_json_normalize
+
+
+def test_stream_reader():
+    data = {"meta": {"a": [1, 2]}, "records": [{"a": 1}, {"a": 2.5}, 3, "x"]}
+    reader = JsonStreamReader(BytesIO(orjson.dumps(data)))
+    assert reader.seek_key("records")
+    assert list(reader.items()) == data["records"]
+
+    reader = JsonStreamReader(BytesIO(b" [ ] "))
+    assert list(reader.items()) == []
+
+    reader = JsonStreamReader(BytesIO(b'{"foo": 1}'))
+    assert not reader.seek_key("bar")
+
+    # values spanning multiple buffer reads
+    records = [{"id": i, "text": "x" * 1000} for i in range(CHUNK_SIZE // 500)]
+    reader = JsonStreamReader(BytesIO(orjson.dumps(records)))
+    assert list(reader.items()) == records
+
+    with pytest.raises(ValueError):
+        list(JsonStreamReader(BytesIO(b'{"foo": 1}')).items())
+
+
+def test_stream_json_normalize(fixtures_path):
+    with open(fixtures_path / "lobbyregister.json", "rb") as fh:
+        data = orjson.loads(fh.read())
+    expected = pd.json_normalize(data, record_path="results")
+
+    df = io.read_pandas(
+        fixtures_path / "lobbyregister.json",
+        handler="json_normalize",
+        record_path="results",
+    )
+    pd.testing.assert_frame_equal(df, expected)
+
+    chunks = list(
+        iter_json_normalize(
+            fixtures_path / "lobbyregister.json", record_path="results", chunksize=5
+        )
+    )
+    assert [len(c) for c in chunks] == [5, 5, 5, 2]
+    pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+
+    # meta from the top-level object needs the full document
+    df = io.read_pandas(
+        fixtures_path / "lobbyregister.json",
+        handler="json_normalize",
+        record_path="results",
+        meta=["resultCount"],
+    )
+    assert len(df) == 17
+    assert "resultCount" in df.columns
+
+    # top-level array
+    df = io.read_pandas(fixtures_path / "testdata.json", handler="json_normalize")
+    assert len(df) == 10000
+    assert list(df.columns) == ["state", "integer", "date"]
+
+    with pytest.raises(KeyError):
+        io.read_pandas(
+            fixtures_path / "lobbyregister.json",
+            handler="json_normalize",
+            record_path="foo",
+        )
+
+
+def test_stream_json_lines(fixtures_path, tmp_path):
+    with open(fixtures_path / "lobbyregister.json", "rb") as fh:
+        records = orjson.loads(fh.read())["results"]
+    path = tmp_path / "lobbyregister.jsonl"
+    with open(path, "wb") as fh:
+        for record in records:
+            fh.write(orjson.dumps(record) + b"\n")
+
+    df = io.read_pandas(path, handler="json_normalize")
+    pd.testing.assert_frame_equal(df, pd.json_normalize(records))
+
+    chunks = io.read_pandas(path, handler="json_normalize", chunksize=10)
+    assert [len(c) for c in chunks] == [10, 7]
+
+    with open(path) as fh:
+        df = io.read_pandas(fh, handler="json_normalize", max_level=0)
+        assert len(df) == 17
+        assert not any("." in k for k in df.columns)
+
+    with open(path, "rb") as fh:
+        df = io.read_pandas(fh, handler="json_normalize", lines=True)
+        assert len(df) == 17